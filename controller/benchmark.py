@@ -0,0 +1,151 @@
+"""
+File name: benchmark.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Measures the throughput of the simulation core on fixed-seed scenarios, from 10 agents in a 500x500 world up to 10k agents, 50k food and 500 adversaries, with and without Q-network inference and training.
+    Every scenario runs in a fresh process and reports ticks per second, generations per minute, peak memory and the time per tick of each profiled phase. Results can be saved as a baseline, and later runs are compared against it so regressions show up as a clear diff.
+
+    Usage:
+        python -m controller.benchmark --save-baseline          # Record the baseline
+        python -m controller.benchmark                          # Compare against it, exits with 1 on a regression
+        python -m controller.benchmark --scenarios small,agents_1000_vectorized --all
+
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from controller.experiment import DEFAULT_CONFIG, run_experiment
+from model.profiler import PROFILER
+
+BASELINE_PATH = 'benchmark_baseline.json'
+
+BENCHMARK_CONFIG = dict(DEFAULT_CONFIG, max_ticks=500, num_generations=3, seed=0)
+
+# Keys of the form "Class.ATTRIBUTE" override class constants, as in experiment sweeps.
+# An initial epsilon of 0 makes every agent act greedily, so every tick runs the Q-network
+SCENARIOS = {
+    'small': {'bounds': (500, 500), 'num_agents': 10, 'food_amount': 30},
+    'small_adversaries': {'bounds': (500, 500), 'num_agents': 10, 'food_amount': 30, 'num_adversaries': 5},
+    'small_inference': {'bounds': (500, 500), 'num_agents': 10, 'food_amount': 30, 'Agent.EPSILON_INITIAL': 0.0},
+    'small_training': {'bounds': (500, 500), 'num_agents': 10, 'food_amount': 30, 'training_enabled': True},
+    'agents_100': {'bounds': (1000, 1000), 'num_agents': 100, 'food_amount': 500, 'num_adversaries': 10},
+    'agents_100_vectorized': {'bounds': (1000, 1000), 'num_agents': 100, 'food_amount': 500, 'num_adversaries': 10, 'vectorized': True},
+    'agents_100_inference': {'bounds': (1000, 1000), 'num_agents': 100, 'food_amount': 500, 'num_adversaries': 10, 'Agent.EPSILON_INITIAL': 0.0},
+    'agents_1000_vectorized': {'bounds': (2000, 2000), 'num_agents': 1000, 'food_amount': 5000, 'num_adversaries': 50, 'vectorized': True},
+    'agents_10000_vectorized': {'bounds': (5000, 5000), 'num_agents': 10000, 'food_amount': 50000, 'num_adversaries': 500, 'vectorized': True},
+}
+SLOW_SCENARIOS = {'small_training', 'agents_10000_vectorized'}  # Only run with --all or when named
+
+def run_scenario(name):
+    # Runs in its own process so peak memory belongs to this scenario alone
+    config = dict(BENCHMARK_CONFIG)
+    config.update(SCENARIOS[name])
+
+    PROFILER.reset()
+    PROFILER.enable()
+    start = time.perf_counter()
+    run_experiment(config)
+    elapsed = time.perf_counter() - start
+
+    ticks = sum(generation['ticks'] for generation in PROFILER.generations)
+    tick_seconds = sum(generation['seconds'] for generation in PROFILER.generations)
+    summary = PROFILER.summary()
+    return {
+        'ticks': ticks,
+        'ticks_per_second': ticks / tick_seconds if tick_seconds else None,
+        'generations_per_minute': config['num_generations'] / elapsed * 60,
+        'peak_memory_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # ru_maxrss is in kilobytes on Linux
+        'phase_ms_per_tick': {phase: stats['total_ms'] / ticks for phase, stats in summary['phases'].items()} if ticks else {},
+        'counters_per_tick': {counter: value / ticks for counter, value in summary['counters'].items()} if ticks else {},
+    }
+
+def run_benchmarks(names):
+    results = {}
+    for name in names:
+        # A fresh worker per scenario keeps memory and class overrides from leaking between them
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results[name] = executor.submit(run_scenario, name).result()
+        print(f"{name}: {results[name]['ticks_per_second']:.1f} ticks/s, {results[name]['generations_per_minute']:.2f} generations/min, "
+              f"{results[name]['peak_memory_mb']:.0f} MB")
+    return results
+
+def compare(results, baseline, tolerance=0.1):
+    # Return one row per scenario and metric with the relative change, and the rows that got worse by more than the tolerance
+    metrics = {'ticks_per_second': 1, 'generations_per_minute': 1, 'peak_memory_mb': -1}  # 1 if higher is better
+    rows = []
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric, direction in metrics.items():
+            old, new = baseline[name].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            row = {'scenario': name, 'metric': metric, 'baseline': old, 'current': new, 'change': change}
+            rows.append(row)
+            if change * direction < -tolerance:
+                regressions.append(row)
+    return rows, regressions
+
+def print_comparison(rows, regressions, results, baseline):
+    print(f"\n{'scenario':<26}{'metric':<24}{'baseline':>12}{'current':>12}{'change':>9}")
+    for row in rows:
+        flag = '  REGRESSION' if row in regressions else ''
+        print(f"{row['scenario']:<26}{row['metric']:<24}{row['baseline']:>12.2f}{row['current']:>12.2f}{row['change']:>+9.1%}{flag}")
+
+    # Phase breakdown of the regressed scenarios, to show where the time went
+    for name in sorted({row['scenario'] for row in regressions}):
+        print(f"\n{name} phase ms per tick (baseline -> current)")
+        old_phases = baseline[name].get('phase_ms_per_tick', {})
+        for phase, new in sorted(results[name]['phase_ms_per_tick'].items(), key=lambda item: -item[1]):
+            old = old_phases.get(phase)
+            print(f"  {phase:<22}{old if old is not None else float('nan'):>10.3f} -> {new:.3f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulation core")
+    parser.add_argument('--scenarios', help="Comma separated scenario names, defaults to every scenario that is not slow")
+    parser.add_argument('--all', action='store_true', help="Include the slow scenarios")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    if args.scenarios:
+        scenario_names = args.scenarios.split(',')
+    else:
+        scenario_names = [name for name in SCENARIOS if args.all or name not in SLOW_SCENARIOS]
+    benchmark_results = run_benchmarks(scenario_names)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(benchmark_results, output_file, indent=2)
+
+    if args.save_baseline:
+        # Keep the baseline of scenarios that were not rerun
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                stored = json.load(baseline_file)
+        stored.update(benchmark_results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(stored, baseline_file, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            stored_baseline = json.load(baseline_file)
+        comparison_rows, regression_rows = compare(benchmark_results, stored_baseline, args.tolerance)
+        print_comparison(comparison_rows, regression_rows, benchmark_results, stored_baseline)
+        sys.exit(1 if regression_rows else 0)
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
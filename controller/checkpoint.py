@@ -0,0 +1,306 @@
+"""
+File name: checkpoint.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Saves and restores the full simulation state at generation boundaries: agents, adversaries, food, both random number generators, the replay store, network and optimizer weights, the running trait statistics and the collected trait data.
+    Checkpoints are compressed NumPy .npz files written by a background thread, so the simulation keeps running while they are saved. Resuming a checkpoint continues the run exactly where it stopped, and forking one starts several what-if branches from the same generation.
+
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import numpy as np
+
+from model.adversary import Adversary
+from model.agent import Agent
+from model.food import Food
+from model.pos import Pos
+from model.q_learning_model import ReplayBuffer, build_q_network
+from model.replay_store import ReplayStore
+
+FORMAT_VERSION = 1
+
+AGENT_FLAGS = ('satisfied', 'at_edge', 'successfully_reproduced', 'just_consumed_food', 'successfully_evaded', 'private_network')
+
+def add_weights(arrays, prefix, weights):
+    for i, weights_array in enumerate(weights):
+        arrays[f'{prefix}_{i}'] = np.array(weights_array)
+
+def read_weights(data, prefix):
+    weights = []
+    while f'{prefix}_{len(weights)}' in data:
+        weights.append(data[f'{prefix}_{len(weights)}'])
+    return weights
+
+def restore_number(value):
+    # Positions and default values are whole numbers at a generation boundary, so give them back their original int type
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+def capture_checkpoint(runner):
+    # Copy everything needed to continue the run into plain arrays; this runs on the simulation thread and is cheap
+    if runner.trainer is not None:
+        runner.trainer.wait()  # The networks must not be read while a background update is changing them
+    agents = runner.agents
+    adversaries = runner.adversaries
+    arrays = {
+        'agent_position': np.array([[agent.position.x, agent.position.y] for agent in agents], dtype=float).reshape(-1, 2),
+        'agent_traits': np.array([[agent.size, agent.speed, agent.vision, agent.strength] for agent in agents], dtype=float).reshape(-1, 4),
+        'agent_heading': np.array([agent.heading for agent in agents], dtype=float),
+        'agent_energy': np.array([agent.energy for agent in agents], dtype=float),
+        'agent_epsilon': np.array([agent.epsilon for agent in agents], dtype=float),
+        'agent_age': np.array([agent.age for agent in agents], dtype=np.int64),
+        'agent_consumed': np.array([agent.consumed for agent in agents], dtype=np.int64),
+        'agent_flags': np.array([[getattr(agent, flag) for flag in AGENT_FLAGS] for agent in agents], dtype=bool).reshape(-1, len(AGENT_FLAGS)),
+        'agent_replay_id': np.array([getattr(agent.replay_buffer, 'agent_id', -1) for agent in agents], dtype=np.int64),
+
+        'adversary_position': np.array([[adversary.position.x, adversary.position.y] for adversary in adversaries], dtype=float).reshape(-1, 2),
+        'adversary_traits': np.array([[adversary.size, adversary.speed, adversary.vision, adversary.attack_power] for adversary in adversaries], dtype=float).reshape(-1, 4),
+        'adversary_heading': np.array([adversary.heading for adversary in adversaries], dtype=float),
+        'adversary_energy': np.array([adversary.energy for adversary in adversaries], dtype=float),
+        'adversary_cooldown': np.array([adversary.cooldown for adversary in adversaries], dtype=np.int64),
+        'adversary_consumed': np.array([adversary.consumed for adversary in adversaries], dtype=np.int64),
+
+        'food_position': np.array([[food_item.position.x, food_item.position.y] for food_item in runner.food], dtype=float).reshape(-1, 2),
+    }
+
+    # Only the filled part of the replay store is kept
+    store = runner.replay_store
+    arrays['replay_states'] = store.states[:store.size].copy()
+    arrays['replay_actions'] = store.actions[:store.size].copy()
+    arrays['replay_rewards'] = store.rewards[:store.size].copy()
+    arrays['replay_next_states'] = store.next_states[:store.size].copy()
+    arrays['replay_dones'] = store.dones[:store.size].copy()
+    arrays['replay_agent_ids'] = store.agent_ids[:store.size].copy()
+
+    add_weights(arrays, 'policy', runner.policy_handle.policy.get_weights())
+    if runner.general_model is not None:
+        add_weights(arrays, 'model', runner.general_model.get_weights())
+        add_weights(arrays, 'optimizer', runner.general_model.optimizer.get_weights())
+    if runner.target_network is not None:
+        add_weights(arrays, 'target', runner.target_network.model.get_weights())
+    for i, agent in enumerate(agents):
+        if agent.private_network and agent._q_network is not None:
+            add_weights(arrays, f'private_{i}', agent._q_network.get_weights())
+
+    # Running statistics are saved as they are, since rebuilding them would round differently
+    for trait, statistics in runner.sim.trait_stats.traits.items():
+        arrays[f'stats_{trait}_counts'] = statistics.counts.copy()
+
+    random_version, random_internal, random_gauss = random.getstate()
+    arrays['python_random_state'] = np.array(random_internal, dtype=np.uint64)
+    _, numpy_keys, numpy_pos, numpy_has_gauss, numpy_gauss = np.random.get_state()
+    arrays['numpy_random_keys'] = numpy_keys.copy()
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'config': {
+            'bounds': list(runner.bounds),
+            'num_agents': runner.num_agents,
+            'num_adversaries': runner.num_adversaries,
+            'food_amount': runner.food_amount,
+            'max_ticks': runner.max_ticks,
+            'tick_rate': runner.tick_rate,
+            'num_generations': runner.num_generations,
+            'delay_between_generations': runner.delay_between_generations,
+            'training_enabled': runner.training_enabled,
+            'model_path': runner.model_path,
+            'vectorized': runner.vectorized,
+        },
+        'current_generation': runner.current_generation,
+        'trait_history': runner.trait_history,
+        'trait_distribution': runner.trait_distribution,
+        'replay': {'capacity': store.capacity, 'position': store.position, 'size': store.size,
+                   'agent_counts': [[agent_id, count] for agent_id, count in store.agent_counts.items()],
+                   'next_agent_id': store.next_agent_id},
+        'trait_stats': {trait: [statistics.count, statistics.mean, statistics.m2] for trait, statistics in runner.sim.trait_stats.traits.items()},
+        'target_updates': runner.target_network.updates if runner.target_network is not None else 0,
+        'trainer': runner.trainer.state() if runner.trainer is not None else None,
+        'python_random': {'version': random_version, 'gauss_next': random_gauss},
+        'numpy_random': {'pos': int(numpy_pos), 'has_gauss': int(numpy_has_gauss), 'cached_gaussian': float(numpy_gauss)},
+    }
+    arrays['meta'] = np.array(json.dumps(meta))
+    return arrays
+
+def write_checkpoint(path, arrays):
+    # Write to a temporary file first so an interrupted write never replaces a good checkpoint
+    with open(path + '.tmp', 'wb') as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(path + '.tmp', path)
+
+def load_checkpoint(path):
+    with np.load(path) as data:
+        arrays = {key: data[key] for key in data.files}
+    meta = json.loads(str(arrays.pop('meta')))
+    return arrays, meta
+
+def resume(path, root=None, canvas=None, seed=None, **overrides):
+    # Build a SimulationRunner from a checkpoint. Overrides replace constructor settings (e.g. num_generations or food_amount),
+    # and a seed reseeds both random number generators so forks of the same checkpoint diverge
+    from controller.simulation import SimulationRunner
+
+    arrays, meta = load_checkpoint(path)
+    config = dict(meta['config'])
+    config.update(overrides)
+
+    # Start from an empty world; everything is filled in from the checkpoint below
+    runner = SimulationRunner(
+        root, canvas, tuple(config['bounds']), 0, 0, 0, config['max_ticks'], config['tick_rate'],
+        config['num_generations'], config['delay_between_generations'], config['training_enabled'],
+        model_path=None, vectorized=config['vectorized']
+    )
+    runner.model_path = config['model_path']
+    runner.num_agents = config['num_agents']
+    runner.num_adversaries = config['num_adversaries']
+    runner.food_amount = config['food_amount']
+    runner.current_generation = meta['current_generation']
+    runner.trait_history = meta['trait_history']
+    runner.trait_distribution = meta['trait_distribution']
+
+    restore_networks(runner, arrays, meta)
+    restore_replay_store(runner, arrays, meta)
+    if meta.get('trainer') is not None:
+        runner.enable_async_training(meta['trainer']['max_staleness'])
+        runner.trainer.restore(meta['trainer'])
+    restore_entities(runner, arrays)
+    restore_statistics(runner, arrays, meta)
+
+    if seed is None:
+        python_random = meta['python_random']
+        random.setstate((python_random['version'], tuple(int(value) for value in arrays['python_random_state']), python_random['gauss_next']))
+        numpy_random = meta['numpy_random']
+        np.random.set_state(('MT19937', arrays['numpy_random_keys'], numpy_random['pos'], numpy_random['has_gauss'], numpy_random['cached_gaussian']))
+    else:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    # Later resumes overwrite the global generators, so the runner keeps its own copy and installs it when it starts running
+    runner.random_state = (random.getstate(), np.random.get_state())
+    return runner
+
+def fork(path, variants):
+    # Start one runner per variant (a dict of resume() keyword arguments) from the same checkpoint; each runner
+    # draws from its own random state once run() or run_headless() is called, whatever order they are run in
+    return [resume(path, **variant) for variant in variants]
+
+def restore_networks(runner, arrays, meta):
+    policy = runner.policy_handle.policy
+    policy_weights = read_weights(arrays, 'policy')
+    policy.layers = [(policy_weights[i], policy_weights[i + 1]) for i in range(0, len(policy_weights), 2)]
+
+    model = runner.general_model
+    if model is not None:
+        model_weights = read_weights(arrays, 'model')
+        model.set_weights(model_weights if model_weights else policy.get_weights())
+
+        # The optimizer's slots have to exist before its saved state can be loaded
+        optimizer_weights = read_weights(arrays, 'optimizer')
+        if optimizer_weights:
+            model.optimizer._create_all_weights(model.trainable_variables)
+            model.optimizer.set_weights(optimizer_weights)
+        # The policy keeps its own saved weights, which lag behind the model's while a background update waits to be swapped in
+
+    target_weights = read_weights(arrays, 'target')
+    if runner.target_network is not None and target_weights:
+        runner.target_network.model.set_weights(target_weights)
+        runner.target_network.updates = meta['target_updates']
+
+def restore_replay_store(runner, arrays, meta):
+    replay = meta['replay']
+    store = ReplayStore(replay['capacity'], Agent.STATE_SIZE)
+    size = replay['size']
+    store.states[:size] = arrays['replay_states']
+    store.actions[:size] = arrays['replay_actions']
+    store.rewards[:size] = arrays['replay_rewards']
+    store.next_states[:size] = arrays['replay_next_states']
+    store.dones[:size] = arrays['replay_dones']
+    store.agent_ids[:size] = arrays['replay_agent_ids']
+    store.position = replay['position']
+    store.size = size
+    store.agent_counts = {agent_id: count for agent_id, count in replay['agent_counts']}
+    store.next_agent_id = replay['next_agent_id']
+    runner.replay_store = store
+
+def restore_entities(runner, arrays):
+    agents = []
+    for i, (x, y) in enumerate(arrays['agent_position']):
+        size, speed, vision, strength = (float(value) for value in arrays['agent_traits'][i])
+        replay_id = int(arrays['agent_replay_id'][i])
+        replay_buffer = runner.replay_store.view(replay_id) if replay_id >= 0 else ReplayBuffer(Agent.REPLAY_BUFFER_CAPACITY)
+        agent = Agent(Pos(restore_number(x), restore_number(y)), size, speed, vision, strength, runner.bounds, replay_buffer, runner.policy_handle)
+        agent.heading = float(arrays['agent_heading'][i])
+        agent.energy = restore_number(arrays['agent_energy'][i])
+        agent.epsilon = float(arrays['agent_epsilon'][i])
+        agent.age = int(arrays['agent_age'][i])
+        agent.consumed = int(arrays['agent_consumed'][i])
+        for flag, value in zip(AGENT_FLAGS, arrays['agent_flags'][i]):
+            setattr(agent, flag, bool(value))
+
+        private_weights = read_weights(arrays, f'private_{i}')
+        if private_weights:
+            agent.q_network = build_q_network(Agent.STATE_SIZE, Agent.ACTION_SIZE)
+            agent.q_network.set_weights(private_weights)
+        agents.append(agent)
+
+    adversaries = []
+    for i, (x, y) in enumerate(arrays['adversary_position']):
+        size, speed, vision, attack_power = (float(value) for value in arrays['adversary_traits'][i])
+        adversary = Adversary(Pos(restore_number(x), restore_number(y)), restore_number(size), speed, restore_number(vision), attack_power, runner.bounds)
+        adversary.heading = float(arrays['adversary_heading'][i])
+        adversary.energy = restore_number(arrays['adversary_energy'][i])
+        adversary.cooldown = int(arrays['adversary_cooldown'][i])
+        adversary.consumed = int(arrays['adversary_consumed'][i])
+        adversaries.append(adversary)
+
+    # The environment holds the same lists, so fill them in place
+    runner.agents[:] = agents
+    runner.adversaries[:] = adversaries
+    runner.food[:] = [Food(Pos(restore_number(x), restore_number(y))) for x, y in arrays['food_position']]
+    runner.sim.next_gen_population.clear()
+
+def restore_statistics(runner, arrays, meta):
+    for trait, (count, mean, m2) in meta['trait_stats'].items():
+        statistics = runner.sim.trait_stats[trait]
+        statistics.count, statistics.mean, statistics.m2 = count, mean, m2
+        statistics.counts = arrays[f'stats_{trait}_counts'].copy()
+    runner.sim.offspring_stats.clear()
+
+class CheckpointWriter:
+    # Compresses and writes checkpoints on a background thread so saving stays off the tick path
+    def __init__(self, max_pending=2):
+        self.error = None  # First exception raised on the worker thread
+        self.queue = queue.Queue(max_pending)
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def check(self):
+        if self.error is not None:
+            raise RuntimeError("Checkpoint writing failed") from self.error
+
+    def submit(self, path, arrays):
+        self.check()
+        self.queue.put((path, arrays))
+
+    def work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # Keep draining so the simulation never blocks on a dead writer
+            try:
+                write_checkpoint(*item)
+            except Exception as error:
+                self.error = error
+
+    def close(self):
+        # Wait for every queued checkpoint to be written
+        self.queue.put(None)
+        self.thread.join()
+        self.check()
@@ -0,0 +1,187 @@
+"""
+File name: experiment.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Runs seed and parameter sweeps of the headless simulation across all cores. A sweep spec lists the base configuration, a grid of values to vary and the seeds to run; every combination becomes one run in a ProcessPoolExecutor.
+    Each finished run is saved to its own file in the output directory, so an interrupted sweep resumes where it stopped, and the trait_history and trait_distribution of every run are merged into history.csv and distribution.csv.
+
+    Example spec (JSON):
+        {
+            "base": {"num_agents": 5, "food_amount": 30, "num_generations": 20},
+            "grid": {"food_amount": [30, 60], "Agent.MUTATION_PROBABILITY": [0.2, 0.4]},
+            "seeds": [0, 1, 2]
+        }
+    Keys of the form "Class.ATTRIBUTE" override class level constants for that run.
+
+"""
+
+import contextlib
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from controller.simulation import SimulationRunner
+from model.adversary import Adversary
+from model.agent import Agent
+from model.entity import Entity
+
+# Classes whose constants a sweep may override
+OVERRIDABLE_CLASSES = {
+    'Agent': Agent,
+    'Adversary': Adversary,
+    'Entity': Entity,
+    'SimulationRunner': SimulationRunner,
+}
+
+DEFAULT_CONFIG = {
+    'bounds': (500, 500),
+    'num_agents': 5,
+    'num_adversaries': 0,
+    'food_amount': 30,
+    'max_ticks': 5000,
+    'num_generations': 5,
+    'training_enabled': False,
+    'vectorized': False,
+}
+
+def expand_sweep(spec):
+    # Turn a sweep spec into one config per grid combination and seed, each with a stable run id
+    grid = spec.get('grid', {})
+    names = sorted(grid)
+    runs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        for seed in spec.get('seeds', [0]):
+            config = dict(DEFAULT_CONFIG)
+            config.update(spec.get('base', {}))
+            config.update(zip(names, values))
+            config['seed'] = seed
+            config['run_id'] = hashlib.sha1(json.dumps(config, sort_keys=True, default=list).encode()).hexdigest()[:12]
+            runs.append(config)
+    return runs
+
+def run_experiment(config):
+    # Run one headless simulation in a worker process and return its results
+    overrides = {key: value for key, value in config.items() if '.' in key}
+    previous = {}
+    try:
+        # Class constants persist in a reused worker, so remember them to restore afterwards
+        for key, value in overrides.items():
+            class_name, attribute = key.split('.', 1)
+            owner = OVERRIDABLE_CLASSES[class_name]
+            previous[key] = (owner, attribute, getattr(owner, attribute))
+            setattr(owner, attribute, value)
+
+        random.seed(config['seed'])
+        np.random.seed(config['seed'])
+
+        # Keep the per generation progress prints of every worker out of the console
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner = SimulationRunner(
+                None, None, tuple(config['bounds']), config['num_agents'], config['num_adversaries'], config['food_amount'],
+                config['max_ticks'], 0, config['num_generations'], 0, config['training_enabled'],
+                model_path=config.get('model_path'), vectorized=config['vectorized']
+            )
+            trait_history = runner.run_headless()
+
+        return {'config': config, 'trait_history': trait_history, 'trait_distribution': runner.trait_distribution}
+    finally:
+        for owner, attribute, value in previous.values():
+            setattr(owner, attribute, value)
+
+class ExperimentRunner:
+    def __init__(self, spec, output_dir, max_workers=None):
+        self.spec = spec
+        self.output_dir = output_dir
+        self.max_workers = max_workers  # Defaults to one worker per core
+        self.runs_dir = os.path.join(output_dir, 'runs')
+        self.failures = {}
+
+    def result_path(self, run_id):
+        return os.path.join(self.runs_dir, f'{run_id}.json')
+
+    def pending_runs(self):
+        # Runs with a saved result are skipped, which is what lets an interrupted sweep resume
+        return [config for config in expand_sweep(self.spec) if not os.path.exists(self.result_path(config['run_id']))]
+
+    def run(self):
+        os.makedirs(self.runs_dir, exist_ok=True)
+        pending = self.pending_runs()
+        total = len(expand_sweep(self.spec))
+        print(f"Running {len(pending)} of {total} runs ({total - len(pending)} already finished)")
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(run_experiment, config): config for config in pending}
+            for future in as_completed(futures):
+                config = futures[future]
+                try:
+                    self.save_result(future.result())
+                    print(f"Finished run {config['run_id']}")
+                except Exception:
+                    self.failures[config['run_id']] = {'config': config, 'error': traceback.format_exc()}
+                    print(f"Run {config['run_id']} failed", file=sys.stderr)
+
+        with open(os.path.join(self.output_dir, 'failures.json'), 'w') as file:
+            json.dump(self.failures, file, indent=2, default=list)
+
+        return self.merge_results()
+
+    def save_result(self, result):
+        # Write to a temporary file first so a crash never leaves a half written result behind
+        path = self.result_path(result['config']['run_id'])
+        with open(path + '.tmp', 'w') as file:
+            json.dump(result, file, default=list)
+        os.replace(path + '.tmp', path)
+
+    def merge_results(self):
+        # Combine every saved run into one history table and one distribution table
+        parameter_names = sorted({key for config in expand_sweep(self.spec) for key in config})
+        history_rows = []
+        distribution_rows = []
+        for config in expand_sweep(self.spec):
+            path = self.result_path(config['run_id'])
+            if not os.path.exists(path):
+                continue
+            with open(path) as file:
+                result = json.load(file)
+
+            parameters = {name: result['config'].get(name) for name in parameter_names}
+            # Entries carry their generation number, as not every generation gets one
+            trait_history = result['trait_history']
+            for entry in range(len(trait_history['population'])):
+                row = dict(parameters, generation=trait_history['generation'][entry])
+                row.update({trait: values[entry] for trait, values in trait_history.items()})
+                history_rows.append(row)
+
+            for trait, values in result['trait_distribution'].items():
+                for value in values:
+                    distribution_rows.append(dict(parameters, trait=trait, value=value))
+
+        self.write_table('history.csv', history_rows)
+        self.write_table('distribution.csv', distribution_rows)
+        return history_rows, distribution_rows
+
+    def write_table(self, name, rows):
+        if not rows:
+            return
+        with open(os.path.join(self.output_dir, name), 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+if __name__ == "__main__":
+    # Usage: python -m controller.experiment sweep.json output_dir [max_workers]
+    with open(sys.argv[1]) as spec_file:
+        sweep_spec = json.load(spec_file)
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    ExperimentRunner(sweep_spec, sys.argv[2], workers).run()
@@ -0,0 +1,113 @@
+"""
+File name: metrics.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Streams one record per generation to disk so long runs keep neither the history in memory nor lose it on a crash. Each field is stored as its own append-only column file of float64 values (size.bin, speed_p50.bin, ...) next to a columns.json schema, and records are buffered and written in blocks.
+    MetricsReader memory-maps the columns, so Visualize can plot a run of any length without loading the whole history.
+
+"""
+
+import json
+import os
+import numpy as np
+
+from model.trait_statistics import AGENT_TRAITS
+
+PERCENTILES = (10, 50, 90)
+
+# Trait means are stored under the bare trait name so a reader can stand in for trait_history
+COLUMNS = ('generation', 'population', 'ticks', 'food_eaten', 'predations') + tuple(
+    f'{trait}{suffix}' for trait in AGENT_TRAITS
+    for suffix in ('', '_min', '_max') + tuple(f'_p{percentile}' for percentile in PERCENTILES)
+)
+
+def generation_record(runner):
+    # Summarise the generation that just ended
+    record = {
+        'generation': runner.current_generation,
+        'population': len(runner.agents),
+        'ticks': runner.game_tick,
+        'food_eaten': runner.food_at_start - len(runner.food),   # Food is only replaced between generations
+        'predations': sum(adversary.consumed for adversary in runner.adversaries),
+    }
+    # Every statistic comes from the environment's running trait statistics, so recording is O(bins) per trait
+    for trait in AGENT_TRAITS:
+        stats = runner.sim.trait_stats[trait]
+        record[trait] = stats.mean if stats.count else np.nan
+        record[f'{trait}_min'] = stats.minimum()
+        record[f'{trait}_max'] = stats.maximum()
+        for percentile in PERCENTILES:
+            record[f'{trait}_p{percentile}'] = stats.percentile(percentile)
+    return record
+
+def column_path(directory, name):
+    return os.path.join(directory, f'{name}.bin')
+
+class MetricsSink:
+    def __init__(self, directory, flush_every=32):
+        self.directory = directory
+        self.flush_every = flush_every  # Generations buffered in memory between writes
+        self.buffer = {name: [] for name in COLUMNS}
+        self.pending = 0
+
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'columns.json'), 'w') as file:
+            json.dump({'columns': list(COLUMNS), 'dtype': 'float64'}, file)
+
+    def append(self, record):
+        for name in COLUMNS:
+            self.buffer[name].append(record[name])
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        for name, values in self.buffer.items():
+            with open(column_path(self.directory, name), 'ab') as file:
+                np.asarray(values, dtype=np.float64).tofile(file)
+            values.clear()
+        self.pending = 0
+
+    def truncate(self, rows):
+        # Drop everything after the first rows records, e.g. when a run resumes from an earlier checkpoint
+        self.flush()
+        for name in COLUMNS:
+            path = column_path(self.directory, name)
+            if os.path.exists(path) and os.path.getsize(path) > rows * 8:
+                os.truncate(path, rows * 8)
+
+    def close(self):
+        self.flush()
+
+class MetricsReader:
+    # Read only, memory-mapped view of a metrics directory with the same indexing as trait_history
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'columns.json')) as file:
+            self.columns = json.load(file)['columns']
+
+        # A crash part way through a flush can leave some columns one block longer than others
+        sizes = [os.path.getsize(column_path(directory, name)) if os.path.exists(column_path(directory, name)) else 0
+                 for name in self.columns]
+        self.rows = min(sizes) // 8 if sizes else 0
+
+    def __getitem__(self, name):
+        if name not in self.columns:
+            raise KeyError(name)
+        if self.rows == 0:
+            return np.empty(0)
+        return np.memmap(column_path(self.directory, name), dtype=np.float64, mode='r', shape=(self.rows,))
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __len__(self):
+        return self.rows
+
+    def keys(self):
+        return list(self.columns)
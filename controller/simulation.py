@@ -2,7 +2,7 @@
 File name: simulation.py
 Author(s): Liam Lawless
 Date created: November 26, 2023
-Last modified: November 26, 2023
+Last modified: October 18, 2026
 
 Description:
 Runs the entire simulation process, managing the environment, agents, adversaries, and food entities, while also handling the evolution of agent traits across generations and implementing the reinforcement learning logic.
@@ -11,15 +11,23 @@ Runs the entire simulation process, managing the environment, agents, adversarie
 
 import random
 import os
+import math
+import time
+import numpy as np
 from model.agent import Agent
 from model.adversary import Adversary
 from model.environment import Environment
+from model.vectorized_environment import VectorizedEnvironment
 from model.food import Food
 from model.pos import Pos
-from model.q_learning_model import train_q_network, ReplayBuffer, build_q_network
-from view.simulation_view import SimulationView
-from view.visualize import Visualize
-from keras.models import load_model
+from model.numpy_policy import NumpyQPolicy
+from model.policy_handle import PolicyHandle
+from model.replay_store import ReplayStore
+from model.profiler import PROFILER
+from model.q_learning_model import train_q_network, build_q_network, load_q_network, TargetNetwork
+from controller.checkpoint import CheckpointWriter, capture_checkpoint
+from controller.metrics import MetricsSink, MetricsReader, generation_record
+from controller.trainer import BackgroundTrainer
 
 class SimulationRunner:
     INITIAL_TRAIT_VALUE = 2.0
@@ -30,9 +38,17 @@ class SimulationRunner:
 
     BATCH_SIZE = 64
     DISCOUNT_FACTOR = 0.95
+    REPLAY_STORE_CAPACITY = 200000  # Transitions kept across all agents
+    TARGET_SYNC_INTERVAL = None  # Minibatch updates between target network syncs, None trains without a target network
 
+    # Frame pacing for the GUI
+    FRAME_RATE = 30             # Frames drawn per second, independent of how fast the simulation runs
+    FRAME_TIME_BUDGET = 0.8     # Share of each frame interval a callback may spend advancing the simulation
+    TICKS_PER_FRAME = None      # Fixed number of ticks per callback instead of the time budget, None uses the budget
 
-    def __init__(self, root, canvas, bounds, num_agents, num_adversaries, food_amount, max_ticks, tick_rate, num_generations, delay_between_generations, training_enabled):
+    MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'agents', 'general_model.keras')  # Resolved from the repository root, independent of the working directory
+
+    def __init__(self, root, canvas, bounds, num_agents, num_adversaries, food_amount, max_ticks, tick_rate, num_generations, delay_between_generations, training_enabled, model_path=MODEL_PATH, vectorized=False):
         self.root = root
         self.canvas = canvas
         self.bounds = bounds
@@ -43,28 +59,59 @@ class SimulationRunner:
         self.tick_rate = tick_rate
         self.num_generations = num_generations
         self.delay_between_generations = delay_between_generations
+        self.model_path = model_path
+        self.vectorized = vectorized  # Use the NumPy array engine instead of per object updates
 
         self.game_tick = 0
         self.current_generation = 0
         self.agents = []
         self.food = []
         self.adversaries = []
-        self.trait_history = {'population': [],'size': [], 'speed': [], 'vision': [], 'strength': []}
+        self.trait_history = {'generation': [], 'population': [],'size': [], 'speed': [], 'vision': [], 'strength': []}  # 'generation' numbers each entry
         self.trait_distribution = {'size': [], 'speed': [], 'vision': [], 'strength': []}
+        self.trait_histograms = {}  # (bin edges, counts) per trait at the end of the simulation
 
-        self.general_model = self.load_or_create_model()
+        # Training needs the Keras model; otherwise the NumPy policy is enough and TensorFlow is never imported
         self.training_enabled = training_enabled
+        self.general_model, policy = self.load_or_create_model()
+
+        # Every agent shares the general model through this handle, choosing actions with its fast NumPy copy
+        self.policy_handle = PolicyHandle(self.general_model, policy)
+        self.replay_store = ReplayStore(SimulationRunner.REPLAY_STORE_CAPACITY, Agent.STATE_SIZE)
+        self.target_network = None
+        if SimulationRunner.TARGET_SYNC_INTERVAL is not None and self.general_model is not None:
+            self.target_network = TargetNetwork(self.general_model, SimulationRunner.TARGET_SYNC_INTERVAL)
+        self.trainer = None  # Set by enable_async_training to train the general model in the background
+
+        self.checkpoint_dir = None
+        self.checkpoint_interval = 1
+        self.checkpoint_writer = None
+        self.metrics_sink = None
+        self.food_at_start = 0
+        self.recorder = None
+        self.profile_report_path = None
+        self.random_state = None  # (random, np.random) states installed when the run starts, set when resuming a checkpoint
+
+        self.speed_multiplier = 1.0  # 1 runs a tick every tick_rate milliseconds, 0 pauses, float('inf') runs as fast as the frame budget allows
+        self.tick_debt = 0.0         # Ticks owed to keep up with the requested speed
+        self.last_callback = 0.0
+        self.last_render = -math.inf
 
         self.sim = None
         self.view = None
 
         self.setup_simulation()  # Set self.sim to a new Environment instance
 
-        
-
     def setup_simulation(self):
-        self.sim = Environment(self.agents, self.adversaries, self.food, self.bounds)
-        self.view = SimulationView(self.canvas, self.sim)
+        if self.vectorized:
+            self.sim = VectorizedEnvironment(self.agents, self.adversaries, self.food, self.bounds)
+        else:
+            self.sim = Environment(self.agents, self.adversaries, self.food, self.bounds)
+
+        # Without a canvas the simulation runs headless and nothing is drawn
+        if self.canvas is not None:
+            from view.simulation_view import SimulationView
+            self.view = SimulationView(self.canvas, self.sim)
         self.populate_simulation()
 
     def populate_simulation(self):
@@ -85,10 +132,11 @@ class SimulationRunner:
                 round(random.uniform(
                     SimulationRunner.INITIAL_TRAIT_VALUE-SimulationRunner.TRAIT_VARIANCE,
                     SimulationRunner.INITIAL_TRAIT_VALUE+SimulationRunner.TRAIT_VARIANCE), 1),
-                self.bounds
+                self.bounds,
+                self.replay_store.view(),
+                self.policy_handle
             )
-            self.agents.append(new_agent)
-            new_agent.q_network = self.general_model
+            self.sim.add_agent(new_agent)
 
         for _ in range(self.num_adversaries):
             rand_pos = self.generate_center_position()
@@ -111,25 +159,48 @@ class SimulationRunner:
         )
 
     def generate_food_position(self):
+        # Top the food up to food_amount, at most one item per integer position in the middle 80% of the world.
+        # Positions are drawn as cell numbers in batches, and repeats and occupied cells are rejected in bulk
         x_min_bound = int(self.bounds[0] * 0.1)
         y_min_bound = int(self.bounds[1] * 0.1)
-
-        while len(self.food) < self.food_amount:
-            new_position = Pos(
-                random.randint(x_min_bound, self.bounds[0]-x_min_bound),
-                random.randint(y_min_bound, self.bounds[1]-y_min_bound)
-            )
-            if all(new_position != f.position for f in self.food):
-                self.food.append(Food(new_position))
+        width = self.bounds[0] - 2 * x_min_bound + 1
+        height = self.bounds[1] - 2 * y_min_bound + 1
+
+        occupied = np.array([(int(f.position.x) - x_min_bound) * height + int(f.position.y) - y_min_bound for f in self.food], dtype=np.int64)
+        missing = min(self.food_amount, width * height) - len(self.food)
+        while missing > 0:
+            cells = np.random.randint(0, width * height, size=missing)
+            _, first = np.unique(cells, return_index=True)
+            cells = cells[np.sort(first)]                # Keep the first draw of each cell, in draw order
+            cells = cells[~np.isin(cells, occupied)]
+            occupied = np.concatenate((occupied, cells))
+            missing -= len(cells)
+
+            xs = (cells // height + x_min_bound).tolist()
+            ys = (cells % height + y_min_bound).tolist()
+            self.food.extend(Food(Pos(x, y)) for x, y in zip(xs, ys))
 
     def end_generation(self):
-        self.view.clear_canvas()
+        if self.view is not None:
+            self.view.clear_canvas()
+
+        self.turn_over_generation()
+
+        if self.current_generation < self.num_generations:
+            self.root.after(self.delay_between_generations, self.start_generation)
+        else:
+            self.finish_simulation()
 
+    def turn_over_generation(self):
         # Increment age and filter agents for the next generation
+        retired = []
         for agent in self.agents:
             agent.age += 1  # Increment agent age
             if agent.consumed and agent.age < Agent.MAX_AGE:
                 self.sim.next_gen_population.append(agent)
+            else:
+                retired.append(agent)
+        self.sim.retire_generation(retired)
         
         next_generation_adversaries = [adversary for adversary in self.adversaries if adversary.consumed >= 1]
 
@@ -138,7 +209,8 @@ class SimulationRunner:
         self.food[:] = []
 
         # Train Q-networks of each agent
-        self.train_agents()
+        with PROFILER.phase('train_agents'):
+            self.train_agents()
 
         for agent in self.agents:
             agent.reset_for_new_generation()
@@ -150,95 +222,303 @@ class SimulationRunner:
 
         self.generate_food_position()
 
-        if self.current_generation < self.num_generations:
-            self.root.after(self.delay_between_generations, self.start_generation)
-        else:
-            print(f"Simulation finished after {self.num_generations} generations")
-
-            # Save the general model
-            self.general_model.save('/Users/liamlawless/Desktop/2023-2024 School Year/CS4100/Natural Selection Simulator/agents/general_model.keras')
-
-            # When the simulation ends, visualize the data 
-            if self.current_generation == self.num_generations:
-                self.collect_data()  # Call after the last generation
-                visualization = Visualize(self.trait_distribution, self.trait_history)
-                visualization.visualize_history(self.trait_history.keys())
-        
         # clear the list for the next simulation
         self.sim.next_gen_population.clear()
 
+        if self.checkpoint_writer is not None and self.current_generation % self.checkpoint_interval == 0:
+            self.save_checkpoint()
+
+    def enable_async_training(self, max_staleness=1):
+        # Train the general model on a worker thread while the next generation runs with the previous weights
+        self.trainer = BackgroundTrainer(self.general_model, self.policy_handle, self.replay_store, self.BATCH_SIZE,
+                                         self.DISCOUNT_FACTOR, self.target_network, max_staleness)
+
+    def enable_checkpoints(self, directory, interval=1):
+        # Snapshot the simulation every interval generations into directory
+        os.makedirs(directory, exist_ok=True)
+        self.checkpoint_dir = directory
+        self.checkpoint_interval = interval
+        if self.checkpoint_writer is None:
+            self.checkpoint_writer = CheckpointWriter()
+
+    def enable_metrics(self, directory, flush_every=32):
+        # Stream a record of every generation to directory; records past the current generation are dropped so resumed runs line up
+        self.metrics_sink = MetricsSink(directory, flush_every)
+        self.metrics_sink.truncate(self.current_generation)
+
+    def enable_recording(self, directory, every=10, image_format='png', show_sensing=False):
+        # Render every Nth tick offscreen to a PNG sequence or an animated GIF ('gif') in directory
+        from view.frame_renderer import FrameRecorder
+        self.recorder = FrameRecorder(directory, self.bounds, every, image_format, show_sensing)
+
+    def enable_profiling(self, report_path=None):
+        # Time every phase of the run; PROFILER.summary() can be read at any point and the JSON report is written when the run finishes
+        PROFILER.reset()
+        PROFILER.enable()
+        self.profile_report_path = report_path
+
+    def save_checkpoint(self):
+        # The state is copied here and compressed and written on the writer's thread
+        path = os.path.join(self.checkpoint_dir, f'generation_{self.current_generation:04d}.npz')
+        self.checkpoint_writer.submit(path, capture_checkpoint(self))
+
+    def finish_simulation(self, visualize=True):
+        print(f"Simulation finished after {self.num_generations} generations")
+
+        # Let background training catch up before the model is saved
+        if self.trainer is not None:
+            self.trainer.close()
+            self.trainer = None
+
+        # Make sure every checkpoint has reached the disk
+        if self.checkpoint_writer is not None:
+            self.checkpoint_writer.close()
+            self.checkpoint_writer = None
+        if self.metrics_sink is not None:
+            self.metrics_sink.close()
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if self.profile_report_path is not None:
+            PROFILER.write_report(self.profile_report_path)
+
+        # Save the general model, or just its weights for .npz paths
+        if self.model_path is not None:
+            os.makedirs(os.path.dirname(self.model_path) or '.', exist_ok=True)
+            if self.model_path.endswith('.npz'):
+                self.policy_handle.policy.save(self.model_path)
+            elif self.general_model is not None:
+                self.general_model.save(self.model_path)
+
+        # When the simulation ends, visualize the data 
+        if self.current_generation == self.num_generations:
+            self.collect_data()  # Call after the last generation
+            if visualize:
+                from view.visualize import Visualize
+                # Plot from the metrics files when they are being written, they hold every generation
+                history = MetricsReader(self.metrics_sink.directory) if self.metrics_sink is not None else self.trait_history
+                visualization = Visualize(self.trait_distribution, history, self.trait_histograms)
+                visualization.visualize_history([trait for trait in self.trait_history if trait != 'generation'])
+
     def start_generation(self):
+        self.begin_generation()
+        self.tick_debt = 0.0
+        self.last_callback = time.perf_counter()
+        self.last_render = -math.inf
+        self.root.after(self.tick_rate, self.run_game_tick)
+
+    def set_speed(self, multiplier):
+        # Can be changed while the GUI is running, e.g. from a key binding
+        self.speed_multiplier = multiplier
+        print(f"Simulation speed x{multiplier:g}")
+
+    def tick_frequency(self):
+        # Ticks per second the current speed asks for
+        if self.tick_rate <= 0:
+            return math.inf
+        return self.speed_multiplier * 1000 / self.tick_rate
+
+    def advance_frame(self):
+        # Run the ticks owed since the last callback, stopping early at the end of a generation or of the frame's time budget
+        now = time.perf_counter()
+        frequency = self.tick_frequency()
+        if SimulationRunner.TICKS_PER_FRAME is not None:
+            # A multiplier of 0 pauses the simulation while the window stays live, and an infinite one leaves the time budget as the only limit
+            if self.speed_multiplier <= 0:
+                ticks = 0
+            elif math.isinf(self.speed_multiplier):
+                ticks = math.inf
+            else:
+                ticks = max(1, int(SimulationRunner.TICKS_PER_FRAME * self.speed_multiplier))
+        elif math.isinf(frequency):
+            ticks = math.inf
+        else:
+            # Only whole ticks are run; the fraction left over carries to the next callback, which may then run none
+            self.tick_debt += (now - self.last_callback) * frequency
+            ticks = int(self.tick_debt)
+        self.last_callback = now
+
+        deadline = now + SimulationRunner.FRAME_TIME_BUDGET / SimulationRunner.FRAME_RATE
+        status = None
+        run = 0
+        while status is None and run < ticks:
+            status = self.tick()
+            run += 1
+            if time.perf_counter() >= deadline:
+                break
+
+        # Ticks that did not fit in the budget are dropped rather than piling up
+        self.tick_debt = max(self.tick_debt - run, 0.0) if run == ticks else 0.0
+        return status
+
+    def next_callback_delay(self):
+        # Milliseconds until the next tick is owed or the next frame is due, whichever is sooner
+        frame_due = max(self.last_render + 1 / SimulationRunner.FRAME_RATE - time.perf_counter(), 0)
+        frequency = self.tick_frequency()
+        tick_due = (1 - self.tick_debt) / frequency if SimulationRunner.TICKS_PER_FRAME is None and frequency > 0 else frame_due
+        return max(1, int(min(frame_due, tick_due) * 1000))
+
+    def begin_generation(self):
         self.game_tick = 0
         self.current_generation += 1
         print(f"Starting generation {self.current_generation}")
-        self.root.after(self.tick_rate, self.run_game_tick)
+        self.food_at_start = len(self.food)
 
-    def run_game_tick(self):
-        self.game_tick += 1
+        # The entity lists were rebuilt in place, so refresh the environment's spatial indexes
+        self.sim.reindex()
+        PROFILER.start_generation()
 
-        self.sim.update_environment()
-        self.view.update_view()
+    def tick(self):
+        # Advance the simulation by a single tick without touching the view.
+        # Returns 'complete' or 'max_ticks' once the generation is over, otherwise None
+        self.game_tick += 1
 
-        if all(agent.is_safe() or agent.energy <= 0 for agent in self.agents):
+        with PROFILER.phase('update_environment'):
+            self.sim.update_environment()
 
-            # Check if all agents who are safe have also successfully reproduced
-            all_safe_agents_reproduced = all(agent.successfully_reproduced for agent in self.agents if agent.is_safe())
+        if self.recorder is not None and self.game_tick % self.recorder.every == 0:
+            self.sim.sync_entities()
+            self.recorder.submit(self.sim, f'{self.current_generation:04d}_{self.game_tick:06d}')
 
-            if all_safe_agents_reproduced:
-                print(f"All agents are done for generation {self.current_generation}. Ending generation.")
+        # Check if all agents are safe or out of energy, and all safe agents have also successfully reproduced
+        if self.sim.all_agents_finished():
+            self.sim.sync_entities()
+            print(f"All agents are done for generation {self.current_generation}. Ending generation.")
+            with PROFILER.phase('collect_data'):
                 self.collect_data() # collect data from each generation
-                self.root.after(self.delay_between_generations, self.end_generation)
-                return
+            self.record_metrics()
+            PROFILER.end_generation(self.current_generation, self.game_tick)
+            return 'complete'
 
         if self.game_tick >= self.max_ticks:
+            self.sim.sync_entities()
             print(f"Reached max ticks for generation {self.current_generation}. Ending generation.")
+            self.record_metrics()
+            PROFILER.end_generation(self.current_generation, self.game_tick)
+            return 'max_ticks'
+
+        return None
+
+    def run_game_tick(self):
+        status = self.advance_frame()
+
+        # Only draw at the frame rate, and always draw the last tick of a generation
+        now = time.perf_counter()
+        if self.view is not None and (status is not None or now - self.last_render >= 1 / SimulationRunner.FRAME_RATE):
+            self.sim.sync_entities()
+            with PROFILER.phase('update_view'):
+                self.view.update_view()
+            self.last_render = now
+
+        if status == 'complete':
+            self.root.after(self.delay_between_generations, self.end_generation)
+            return
+
+        if status == 'max_ticks':
             self.end_generation()
             return
 
-        self.root.after(self.tick_rate, self.run_game_tick)
-        
+        self.root.after(self.next_callback_delay(), self.run_game_tick)
+
+    def install_random_state(self):
+        # Runners forked from one checkpoint share the global generators, so each puts its own state back when it starts
+        if self.random_state is not None:
+            python_state, numpy_state = self.random_state
+            random.setstate(python_state)
+            np.random.set_state(numpy_state)
+            self.random_state = None
 
     def run(self):
+        self.install_random_state()
         self.start_generation()
 
+    def run_headless(self):
+        # Runs every generation in a tight loop with no Tk scheduling or drawing, then returns the collected history
+        self.install_random_state()
+        while self.current_generation < self.num_generations:
+            self.begin_generation()
+
+            while self.tick() is None:
+                pass
+
+            self.turn_over_generation()
+
+        self.finish_simulation(visualize=False)
+        return self.trait_history
+
     def collect_data(self):
-        # Calculate the average traits of agents for the line chart
+        # Read the average traits of agents for the line chart from the environment's running statistics
+        stats = self.sim.trait_stats
         if len(self.agents) > 0:
-            data = {
-                'population': len(self.agents),
-                'size': sum(agent.size for agent in self.agents) / len(self.agents),
-                'speed': sum(agent.speed for agent in self.agents) / len(self.agents),
-                'vision': sum(agent.vision for agent in self.agents) / len(self.agents),
-                'strength': sum(agent.strength for agent in self.agents) / len(self.agents)
-            }
-
-            # Append the average of each trait to its respective history list
-            for trait, average in data.items():
-                self.trait_history[trait].append(average)
+            # Generations that hit max_ticks or died out have no entry, and finish_simulation collects the last one a second time
+            recorded = self.trait_history['generation']
+            if not recorded or recorded[-1] != self.current_generation:
+                data = {
+                    'generation': self.current_generation,
+                    'population': len(self.agents),
+                    'size': stats['size'].mean,
+                    'speed': stats['speed'].mean,
+                    'vision': stats['vision'].mean,
+                    'strength': stats['strength'].mean
+                }
+
+                # Append the average of each trait to its respective history list
+                for trait, average in data.items():
+                    self.trait_history[trait].append(average)
 
             # Collect the distribution of each trait for the bar chart
             # Do this only at the end of the simulation
             if self.current_generation == self.num_generations:
                 for trait in self.trait_distribution.keys():
                     self.trait_distribution[trait] = [getattr(agent, trait) for agent in self.agents]
+                    self.trait_histograms[trait] = stats[trait].histogram()
+
+    def record_metrics(self):
+        if self.metrics_sink is not None:
+            self.metrics_sink.append(generation_record(self))
 
     def train_agents(self):
         if not self.training_enabled:
             return  # Skip training if it's disabled
 
+        shared_updates = 0
         for agent in self.agents:
-            if len(agent.replay_buffer.buffer) >= self.BATCH_SIZE:
-                train_q_network(agent.q_network, agent.replay_buffer, self.BATCH_SIZE, self.DISCOUNT_FACTOR)
+            if len(agent.replay_buffer) >= self.BATCH_SIZE:
+                if agent.uses_shared_policy():
+                    # Agents sharing the general model learn from the pooled experience in the replay store
+                    if self.trainer is not None:
+                        shared_updates += 1  # Left to the background trainer
+                    else:
+                        train_q_network(self.general_model, self.replay_store, self.BATCH_SIZE, self.DISCOUNT_FACTOR, self.target_network)
+                else:
+                    # Private networks act with their own Keras model, so they keep training inline
+                    train_q_network(agent.q_network, agent.replay_buffer, self.BATCH_SIZE, self.DISCOUNT_FACTOR)
+
+        if self.trainer is not None:
+            # The trainer swaps the new weights into the policy at a later generation boundary
+            self.trainer.step(shared_updates)
+        else:
+            # Pick up the new weights for action selection
+            self.policy_handle.refresh()
     
     def load_or_create_model(self):
-        if os.path.exists('/Users/liamlawless/Desktop/2023-2024 School Year/CS4100/Natural Selection Simulator/agents/general_model.keras'):
+        # Returns the Keras model (None when it is not needed) and the NumPy policy used to choose actions
+        model = None
+        if self.model_path is not None and os.path.exists(self.model_path):
             print("Loading existing model...")
-            model = load_model('/Users/liamlawless/Desktop/2023-2024 School Year/CS4100/Natural Selection Simulator/agents/general_model.keras')
-            self.training_enabled = False  # Flag to disable further training
-            return model
+            if self.model_path.endswith('.npz'):
+                policy = NumpyQPolicy.load(self.model_path)
+            else:
+                model = load_q_network(self.model_path)
+                policy = NumpyQPolicy.from_keras(model)
         else:
             print("Creating new model...")
-            self.training_enabled = True
-            state_size = 4
-            action_size = 4
-            return build_q_network(state_size, action_size)
\ No newline at end of file
+            policy = NumpyQPolicy.random(Agent.STATE_SIZE, Agent.ACTION_SIZE)
+
+        # Only build a Keras model, starting from the policy's weights, when it is going to be trained
+        if model is None and self.training_enabled:
+            model = build_q_network(Agent.STATE_SIZE, Agent.ACTION_SIZE)
+            model.set_weights(policy.get_weights())
+            policy = NumpyQPolicy.from_keras(model)
+
+        return model, policy
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+File name: trainer.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Provides the BackgroundTrainer class, which trains the general Q-network on a worker thread between generations so the next generation can start right away.
+    Each update trains on a snapshot of the replay store with its own random stream, while the agents keep choosing actions with the NumPy policy's previous weights. The trained weights are swapped into the policy in one assignment at a later generation boundary.
+    max_staleness sets how many generations of experience the acting policy may be missing: 0 waits for every update (on-policy, like training inline), 1 lets each update overlap the next generation, and higher values only wait when the policy falls that far behind. Runs are reproducible for 0 and 1; above that, whether an update has finished at a boundary depends on timing.
+
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+
+from model.q_learning_model import train_q_network
+
+class BackgroundTrainer:
+    def __init__(self, model, policy_handle, replay_store, batch_size, discount_factor, target_network=None, max_staleness=1):
+        self.model = model                    # Back buffer, only touched by the worker while an update runs
+        self.policy_handle = policy_handle    # Front buffer the agents act with
+        self.replay_store = replay_store
+        self.batch_size = batch_size
+        self.discount_factor = discount_factor
+        self.target_network = target_network
+        self.max_staleness = max_staleness
+
+        self.boundaries = 0       # Generation boundaries seen so far
+        self.applied = 0          # The acting policy has learned from the experience up to this boundary
+        self.pending_updates = 0  # Minibatch updates earned but not handed to the worker yet
+        self.job = None           # Future of the running (or finished but not swapped in) update
+        self.job_through = None   # Boundary the experience of that update goes up to
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def step(self, updates):
+        # Called at every generation boundary with the number of minibatch updates the finished generation earned
+        self.boundaries += 1
+        self.pending_updates += updates
+        required = self.boundaries - self.max_staleness
+
+        if self.job is not None and (self.job.done() or self.applied < required):
+            self.swap()
+        if self.job is None:
+            if self.pending_updates:
+                self.submit()
+            else:
+                self.applied = self.boundaries
+        if self.applied < required:
+            self.swap()
+
+    def submit(self):
+        # The worker's random stream is seeded from the global one here, so the run stays reproducible
+        snapshot = self.replay_store.snapshot(np.random.RandomState(np.random.randint(2 ** 31)))
+        self.job = self.executor.submit(self.train, snapshot, self.pending_updates)
+        self.job_through = self.boundaries
+        self.pending_updates = 0
+
+    def train(self, replay_store, updates):
+        for _ in range(updates):
+            train_q_network(self.model, replay_store, self.batch_size, self.discount_factor, self.target_network)
+
+    def wait(self):
+        # Block until the running update has finished, e.g. before its networks are read, without swapping it in
+        if self.job is not None:
+            self.job.result()
+
+    def swap(self):
+        self.wait()
+        self.policy_handle.refresh()  # Replaces the policy's layers in one assignment
+        self.applied = self.job_through
+        self.job = None
+        self.job_through = None
+
+    def close(self):
+        # Finish every update still owed so the final model has learned from the whole run
+        if self.job is not None:
+            self.swap()
+        if self.pending_updates:
+            self.submit()
+            self.swap()
+        self.executor.shutdown()
+
+    def state(self):
+        # Only valid after wait(), the way checkpoints capture it
+        return {'max_staleness': self.max_staleness, 'boundaries': self.boundaries, 'applied': self.applied,
+                'pending_updates': self.pending_updates, 'job_through': self.job_through}
+
+    def restore(self, state):
+        self.boundaries = state['boundaries']
+        self.applied = state['applied']
+        self.pending_updates = state['pending_updates']
+        self.job_through = state['job_through']
+
+        # An update that had finished but was not swapped in yet; its weights are already in the model
+        self.job = None
+        if self.job_through is not None:
+            self.job = Future()
+            self.job.set_result(None)
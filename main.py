@@ -2,17 +2,16 @@
 File name: main.py
 Author(s): Liam Lawless
 Date created: November 22, 2023
-Last modified: November 26, 2023
+Last modified: October 17, 2026
 
 Description:
     This script serves as the entry point for the natural selection simulation. It sets up the environment, initializes the simulation agents and food sources, and starts the main application loop.
 
 Dependencies:
-    - tkinter: Provides GUI components for the simulation.
+    - tkinter: Provides GUI components for the simulation, imported only when a window is opened.
     
 """
 
-import tkinter as tk
 from controller.simulation import SimulationRunner
 
 # Configuration Constants
@@ -25,21 +24,38 @@ TICK_RATE = 1  # Milliseconds between ticks
 NUM_GENERATIONS = 5  # The total number of generations to simulate
 DELAY_BETWEEN_GENERATIONS = 5  # Delay in milliseconds between generations
 TRAINING_ENABLED = False
+VECTORIZED = False  # Advance the world with the NumPy array engine, suited to very large populations
+HEADLESS = False  # Run every generation without a window and print the trait history at the end
 
 if __name__ == "__main__":
-    # Set up the GUI
-    root = tk.Tk()
-    root.title("Natural Selection Simulation")
-    canvas = tk.Canvas(root, width=BOUNDS[0], height=BOUNDS[1], bg='white')
-    canvas.pack()
-
-    # Create and run the simulation
-    simulation_runner = SimulationRunner(
-        root, canvas, BOUNDS, NUM_AGENTS, NUM_ADVERSARIES, FOOD_AMOUNT,
-        MAX_TICKS, TICK_RATE, NUM_GENERATIONS, DELAY_BETWEEN_GENERATIONS, TRAINING_ENABLED
-    )
-    simulation_runner.run()
-
-    # Start the Tkinter event loop
-    root.mainloop()
-
+    if HEADLESS:
+        # No Tk root or canvas is needed when running headless
+        simulation_runner = SimulationRunner(
+            None, None, BOUNDS, NUM_AGENTS, NUM_ADVERSARIES, FOOD_AMOUNT,
+            MAX_TICKS, TICK_RATE, NUM_GENERATIONS, DELAY_BETWEEN_GENERATIONS, TRAINING_ENABLED,
+            vectorized=VECTORIZED
+        )
+        print(simulation_runner.run_headless())
+    else:
+        # Set up the GUI, importing tkinter here so headless runs work without it
+        import tkinter as tk
+        root = tk.Tk()
+        root.title("Natural Selection Simulation")
+        canvas = tk.Canvas(root, width=BOUNDS[0], height=BOUNDS[1], bg='white')
+        canvas.pack()
+
+        # Create and run the simulation
+        simulation_runner = SimulationRunner(
+            root, canvas, BOUNDS, NUM_AGENTS, NUM_ADVERSARIES, FOOD_AMOUNT,
+            MAX_TICKS, TICK_RATE, NUM_GENERATIONS, DELAY_BETWEEN_GENERATIONS, TRAINING_ENABLED,
+            vectorized=VECTORIZED
+        )
+        simulation_runner.run()
+
+        # + and - double or halve the simulation speed while it runs (+ also resumes from a pause), space pauses and resumes
+        root.bind('+', lambda event: simulation_runner.set_speed(simulation_runner.speed_multiplier * 2 or 1))
+        root.bind('-', lambda event: simulation_runner.set_speed(simulation_runner.speed_multiplier / 2))
+        root.bind('<space>', lambda event: simulation_runner.set_speed(0 if simulation_runner.speed_multiplier else 1))
+
+        # Start the Tkinter event loop
+        root.mainloop()
@@ -2,7 +2,7 @@
 File name: adversary.py
 Author(s): Liam Lawless
 Date created: November 25, 2023
-Last modified: November 25, 2023
+Last modified: October 17, 2026
 
 Description:
     The Adversary class encapsulates the attributes and behaviors of predators in a natural selection simulation. It handles their movement, interaction with agents (prey), energy levels, simulating evolutionary processes.
@@ -15,11 +15,13 @@ class Adversary(Entity):
     DEFAULT_ENERGY = 500
     COOLDOWN_AFTER_EATING = 500  # Cooldown period after eating
 
+    __slots__ = ('cooldown', 'attack_power', 'defended_agents')
+
     def __init__(self, position, size, speed, vision, attack_power, bounds):
         super().__init__(position, size, speed, vision, bounds)
         self.cooldown = 0
         self.attack_power = attack_power
-        self.defended_agents = []
+        self.defended_agents = set()  # Agents that fought this adversary off, ignored for the rest of the generation
 
     def calculate_energy_cost(self):
         # Agents might have a different energy cost calculation
@@ -30,22 +32,23 @@ class Adversary(Entity):
         if self.cooldown > 0:
             self.cooldown -= 1  # Rate at which an adversary recovers after eating
 
-    def seek_agents(self, agents):
+    def seek_agents(self, environment):
         # Only sense agents within the vision range
         # Filter out agents that are satisfied and at the edge (safe agents)
-        targetable_agents = [
-            agent for agent in agents
-            if not (agent.satisfied and agent.at_edge) and
-            self.position.distance_to(agent.position) <= self.vision * Adversary.VISION_RANGE_MULTIPLIER and
-            agent not in self.defended_agents
-        ]
+        closest_agent = environment.agent_grid.nearest(
+            self.position,
+            self.vision_radius,
+            predicate=self.is_targetable
+        )
         # Find the closest agent
-        if targetable_agents and self.cooldown == 0:
-            closest_agent = min(targetable_agents, key=lambda a: self.position.distance_to(a.position))
+        if closest_agent is not None and self.cooldown == 0:
             self.move_towards(closest_agent.position)
         else:
             self.wander()
 
+    def is_targetable(self, agent):
+        return not (agent.satisfied and agent.at_edge) and agent not in self.defended_agents
+
     def reset_for_new_generation(self):
         super().reset_for_new_generation()  # Reset common entity properties
         self.energy = Adversary.DEFAULT_ENERGY
@@ -2,7 +2,7 @@
 File name: agent.py
 Author(s): Liam Lawless
 Date created: November 10, 2023
-Last modified: November 25, 2023
+Last modified: October 17, 2026
 
 Description:
     The Agent class encapsulates the attributes and behaviors of prey in a natural selection simulation. It handles their movement, interaction with food, energy levels, and reproduction, simulating evolutionary processes.
@@ -11,6 +11,7 @@ Description:
 
 from model.q_learning_model import build_q_network, ReplayBuffer
 from model.entity import Entity
+from model.perception import Perception
 from model.pos import Pos
 import numpy as np
 import math
@@ -31,21 +32,42 @@ class Agent(Entity):
     EPSILON_DECAY = 1     # Use decay value of 1 if no longer training
     #EPSILON_DECAY = 0.9995
 
-    def __init__(self, position, size, speed, vision, strength, bounds):
+    __slots__ = ('_strength', 'satisfied', 'at_edge', 'age', 'policy_handle', 'private_network', '_q_network', 'epsilon',
+                 'replay_buffer', 'just_consumed_food', 'successfully_evaded', 'successfully_reproduced', 'perception')
+
+    def __init__(self, position, size, speed, vision, strength, bounds, replay_buffer=None, policy_handle=None, private_network=False):
+        self._strength = strength  # Set first, the energy cost computed by the Entity constructor depends on it
         super().__init__(position, size, speed, vision, bounds)
         self.energy = Agent.DEFAULT_ENERGY
-        self.strength = strength
         self.satisfied = False
         self.at_edge = False
         self.age = 0
 
         # Q learning properties
-        self.q_network = build_q_network(Agent.STATE_SIZE, Agent.ACTION_SIZE)
+        self.policy_handle = policy_handle      # Shared policy used by default
+        self.private_network = private_network  # Set to give the agent its own network, built on first use
+        self._q_network = None
         self.epsilon = Agent.EPSILON_INITIAL
-        self.replay_buffer = ReplayBuffer(self.REPLAY_BUFFER_CAPACITY)  # Initialize replay buffer with a certain capacity
+        # Use the given replay buffer (e.g. a view on a shared replay store), otherwise initialize one with a certain capacity
+        self.replay_buffer = replay_buffer if replay_buffer is not None else ReplayBuffer(self.REPLAY_BUFFER_CAPACITY)
         self.just_consumed_food = False
         self.successfully_evaded = False
         self.successfully_reproduced = False
+        self.perception = Perception()  # What the agent last saw, shared by its state, actions and sensing
+
+    @property
+    def strength(self):
+        return self._strength
+
+    @strength.setter
+    def strength(self, value):
+        self._strength = value
+        self.update_derived()
+
+    def update_derived(self):
+        super().update_derived()
+        # Larger agents reach food from further away
+        self.collision_radius = self.ENTITY_RADIUS + self._size
 
     def calculate_energy_cost(self):
         # Agents might have a different energy cost calculation
@@ -61,17 +83,51 @@ class Agent(Entity):
             return
 
         # Current state
-        current_state = self.get_current_state(environment)
+        current_state = self.get_observation(environment)
+
+        action = self.explore_action()
+        if action is None:
+            action_values = np.asarray(self.inference_model()(current_state, training=False))
+            action = np.argmax(action_values[0])
+
+        self.complete_action(action, current_state, environment)
+
+    def inference_model(self):
+        # Choose actions with the shared policy (NumPy or Keras) unless the agent has its own network
+        if self.uses_shared_policy():
+            return self.policy_handle.inference_model()
+        return self.q_network
+
+    def uses_shared_policy(self):
+        return not self.private_network and self.policy_handle is not None
 
+    @property
+    def q_network(self):
+        if self.uses_shared_policy():
+            return self.policy_handle.q_network
+
+        # Only build a private network the first time it is actually needed
+        if self._q_network is None:
+            self._q_network = build_q_network(Agent.STATE_SIZE, Agent.ACTION_SIZE)
+        return self._q_network
+
+    @q_network.setter
+    def q_network(self, network):
+        # Assigning a network gives the agent its own private network
+        self._q_network = network
+        self.private_network = True
+
+    def get_observation(self, environment):
         # Reshape the current state to match the input shape expected by the model
-        current_state = np.array(current_state).reshape(1, -1)
+        return np.array(self.get_current_state(environment)).reshape(1, -1)
 
+    def explore_action(self):
+        # Epsilon greedy draw: a random action when exploring, otherwise None so the caller asks the Q-network
         if np.random.rand() <= self.epsilon:
-            action = np.random.randint(0, Agent.ACTION_SIZE)
-        else:
-            action_values = self.q_network.predict(current_state)
-            action = np.argmax(action_values[0])
+            return np.random.randint(0, Agent.ACTION_SIZE)
+        return None
 
+    def complete_action(self, action, current_state, environment):
         # Execute the action and observe new state and reward
         reward, done = self.execute_action(action, environment)
         new_state = self.get_current_state(environment)
@@ -83,47 +139,22 @@ class Agent(Entity):
         if self.epsilon > Agent.EPSILON_MIN:
             self.epsilon *= Agent.EPSILON_DECAY
     
+    def perceive(self, environment):
+        # Nearest food, adversary and prey in sight, surveyed again only for the parts of the world that changed
+        return self.perception.update(self, environment)
+
     def sense_environment(self, environment):
-        # Calculate the sensing radius based on the vision trait
-        vision_radius = self.vision * Agent.VISION_RANGE_MULTIPLIER
-
-        # Detect all food within the sensing radius
-        food_in_sight = []
-        for food in environment.food:
-            if self.position.distance_to(food.position) <= vision_radius:
-                food_in_sight.append(food)
-
-        # Detect all adversaries within the sensing radius
-        adversary_in_sight = []
-        for adversary in environment.adversaries:
-            if self is not adversary and self.position.distance_to(adversary.position) <= vision_radius:
-                adversary_in_sight.append(adversary)
-
-        # Detect other agents within the sensing radius
-        agents_in_sight = []
-        for other_agent in environment.population:
-            if self is not other_agent and self.position.distance_to(other_agent.position) <= vision_radius:
-                agents_in_sight.append(other_agent)
-        
-                
+        # Detect the closest food, adversary and smaller agent within the sensing radius
+        perception = self.perceive(environment)
+
         # Perform actions based on the sensed environment
         # For example, move towards the closest food item
-        if adversary_in_sight:
-            closest_adversary = min(adversary_in_sight, key=lambda f: self.position.distance_to(f.position))
-            self.flee(closest_adversary.position)
-        elif food_in_sight:
-            closest_food = min(food_in_sight, key=lambda f: self.position.distance_to(f.position))
-            self.move_towards(closest_food.position)
-        elif agents_in_sight:
-            small_agents_in_sight = []
-            for agent in agents_in_sight:
-                if self.size - agent.size >= 0.75:
-                    small_agents_in_sight.append(agent)
-
-            if small_agents_in_sight:
-                closest_agent = min(small_agents_in_sight, key=lambda f: self.position.distance_to(f.position))
-
-                self.move_towards(closest_agent.position) 
+        if perception.adversary is not None:
+            self.flee(perception.adversary.position)
+        elif perception.food is not None:
+            self.move_towards(perception.food.position)
+        elif perception.prey is not None:
+            self.move_towards(perception.prey.position)
 
     def flee(self, target_position):
         # Calculate the direction towards the target
@@ -134,18 +165,20 @@ class Agent(Entity):
         self.move(math.cos(self.heading), math.sin(self.heading))
 
     def return_home(self):
-        # Determine the closest edge of the canvas to the agent's current position
-        edges = [Pos(0, self.position.y), Pos(self.bounds[0], self.position.y),
-                 Pos(self.position.x, 0), Pos(self.position.x, self.bounds[1])]
-        closest_edge = min(edges, key=lambda edge: self.position.distance_to(edge))
-        
+        # Determine the closest edge of the canvas to the agent's current position: left, right, top or bottom
+        x, y = self.position.x, self.position.y
+        distance, edge = min((abs(x), 0), (abs(self.bounds[0] - x), 1), (abs(y), 2), (abs(self.bounds[1] - y), 3))
+
         # Check if the agent is already at the edge
-        if self.position.distance_to(closest_edge) < self.ENTITY_RADIUS:
+        if distance < self.ENTITY_RADIUS:
             self.at_edge = True
             return
-        
+
         # Move towards the edge if not there yet
-        self.move_towards(closest_edge)
+        if edge < 2:
+            self.move_towards(Pos(0 if edge == 0 else self.bounds[0], y))
+        else:
+            self.move_towards(Pos(x, 0 if edge == 2 else self.bounds[1]))
 
     def is_safe(self):
         # Returns True if the agent is at the edge and has eaten enough food to be safe
@@ -157,7 +190,9 @@ class Agent(Entity):
         speed = self.mutate_trait(self.speed)
         vision = self.mutate_trait(self.vision)
         strength = self.mutate_trait(self.strength)
-        environment.next_gen_population.append(Agent(self.position, size, speed, vision, strength, self.bounds))
+        # Offspring share the parent's policy and log into the same replay store
+        offspring = Agent(self.position, size, speed, vision, strength, self.bounds, self.replay_buffer.offspring_buffer(), self.policy_handle)
+        environment.add_offspring(offspring)
     
     def mutate_trait(self, trait_value):
         if random.random() < Agent.MUTATION_PROBABILITY:
@@ -185,32 +220,14 @@ class Agent(Entity):
 
     def get_current_state(self, environment):
         # Implement logic to construct the current state vector
-        # Calculate the sensing radius based on the vision trait
-        vision_radius = self.vision * Agent.VISION_RANGE_MULTIPLIER
-
         # Prepare the state vector values
         energy = round(self.energy / Agent.DEFAULT_ENERGY, 2)
-        presence_of_food = 0
-        presence_of_adversaries = 0
-        presence_of_agents = 0
-
-        # Detect all food within the sensing radius
-        for food in environment.food:
-            if self.position.distance_to(food.position) <= vision_radius:
-                #observation['food'].append(food)
-                presence_of_food = 1
-
-        # Detect all adversaries within the sensing radius
-        for adversary in environment.adversaries:
-            if self.position.distance_to(adversary.position) <= vision_radius:
-                #observation['adversaries'].append(adversary)
-                presence_of_adversaries = 1
-
-        # Detect other agents within the sensing radius
-        for other_agent in environment.population:
-            if self is not other_agent and self.position.distance_to(other_agent.position) <= vision_radius:
-                #observation['agents'].append(other_agent)
-                presence_of_agents = 1
+
+        # Detect food, adversaries and other agents within the sensing radius
+        perception = self.perceive(environment)
+        presence_of_food = int(perception.food is not None)
+        presence_of_adversaries = int(perception.adversary is not None)
+        presence_of_agents = int(perception.agent_in_sight)
 
         # Return the observation vector
         vector = [energy, presence_of_food, presence_of_adversaries, presence_of_agents]
@@ -247,17 +264,10 @@ class Agent(Entity):
         return reward, done
 
     def flee_from_closest_adversary(self, environment):
-        # Define the observable space of the agent
-        vision_radius = self.vision * Agent.VISION_RANGE_MULTIPLIER
-
-        # Find the closest adversary and flee
-        adversary_in_sight = []
-        for adversary in environment.adversaries:
-            if self is not adversary and self.position.distance_to(adversary.position) <= vision_radius:
-                adversary_in_sight.append(adversary)
+        # Find the closest adversary within the observable space of the agent and flee
+        closest_adversary = self.perceive(environment).adversary
 
-        if adversary_in_sight:
-            closest_adversary = min(adversary_in_sight, key=lambda f: self.position.distance_to(f.position))
+        if closest_adversary is not None:
             self.flee(closest_adversary.position)
             self.successfully_evaded = True
 
@@ -270,32 +280,17 @@ class Agent(Entity):
 
     # Consume either the closest food item or the closest small adversary
     def consume_closest_food(self, environment):
-        # Define the observable space of the agent
-        vision_radius = self.vision * Agent.VISION_RANGE_MULTIPLIER
-
         # Factor in agent size
-        agent_size = self.ENTITY_RADIUS + self.size 
-
-        # Detect all food within the sensing radius
-        food_in_sight = []
-        for food in environment.food:
-            if self.position.distance_to(food.position) <= vision_radius:
-                food_in_sight.append(food)
-
-        small_agents_in_sight = []
-        for other_agent in environment.population:
-            # Check if the other agent is different and within the vision radius
-            if self is not other_agent and self.position.distance_to(other_agent.position) <= vision_radius:
-                # Check if the other agent is sufficiently smaller
-                if self.size - other_agent.size >= 0.75:
-                    small_agents_in_sight.append(other_agent)
+        agent_size = self.collision_radius
 
-        # if there is a small agent and food item, go to the closest one
-        if small_agents_in_sight and food_in_sight:
-            closest_agent = min(small_agents_in_sight, key=lambda f: self.position.distance_to(f.position))
-            closest_food = min(food_in_sight, key=lambda f: self.position.distance_to(f.position))
+        # Find the closest food and the closest sufficiently smaller agent within the sensing radius
+        perception = self.perceive(environment)
+        closest_food = perception.food
+        closest_agent = perception.prey
 
-            if self.position.distance_to(closest_agent.position) < self.position.distance_to(closest_food.position):
+        # if there is a small agent and food item, go to the closest one
+        if closest_agent is not None and closest_food is not None:
+            if perception.prey_distance_squared < perception.food_distance_squared:
                 self.move_towards(closest_agent.position)
                 
                 # Check if the predator is close enough to cannibalize the prey
@@ -313,8 +308,7 @@ class Agent(Entity):
                     environment.remove_food(closest_food)
                     self.just_consumed_food = True
 
-        elif small_agents_in_sight:
-            closest_agent = min(small_agents_in_sight, key=lambda f: self.position.distance_to(f.position))
+        elif closest_agent is not None:
             self.move_towards(closest_agent.position)
             
             # Check if the predator is close enough to cannibalize the prey
@@ -324,8 +318,7 @@ class Agent(Entity):
                 environment.remove_agent(closest_agent)
                 self.just_consumed_food = True
 
-        elif food_in_sight:
-            closest_food = min(food_in_sight, key=lambda f: self.position.distance_to(f.position))
+        elif closest_food is not None:
             self.move_towards(closest_food.position)
 
             if self.position.distance_to(closest_food.position) <= agent_size + closest_food.ENTITY_RADIUS:
@@ -338,6 +331,10 @@ class Agent(Entity):
             self.satisfied = True
             self.return_home()
 
+    def can_cannibalize(self, other_agent):
+        # Check if the other agent is sufficiently smaller to be eaten
+        return self.size - other_agent.size >= 0.75
+
     def calculate_reward(self, environment, action):
         # Initialize reward
         reward = 0
@@ -370,6 +367,6 @@ class Agent(Entity):
                 reward += PENALTY_FAILED_REPRODUCTION
 
         # Deduct energy cost for all actions
-        reward += PENALTY_LOST_ENERGY * self.calculate_energy_cost()
+        reward += PENALTY_LOST_ENERGY * self.energy_cost
 
         return reward
\ No newline at end of file
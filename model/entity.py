@@ -2,10 +2,11 @@
 File name: entity.py
 Author(s): Liam Lawless
 Date created: November 25, 2023
-Last modified: November 25, 2023
+Last modified: October 17, 2026
 
 Description:
     The Entity class encapsulates the abstract attributes and behaviors of both agents and adversaries in the selection simulation. It handles their movement, interaction with food, and energy levels.
+    Entities use __slots__ to keep them small, and values derived from the traits (energy cost, vision radius and collision radius) are computed once and recomputed only when a trait changes.
 
 """
 
@@ -19,15 +20,52 @@ class Entity:
     MAX_ANGLE_CHANGE = math.radians(15)  # 15 degrees
     DEFAULT_ENERGY = 500  # Set a default value to be overridden by subclasses
 
+    __slots__ = ('position', '_size', '_speed', '_vision', 'bounds', 'energy', 'heading', 'consumed',
+                 'energy_cost', 'vision_radius', 'collision_radius')
+
     def __init__(self, position, size, speed, vision, bounds):
         self.position = position
-        self.size = size
-        self.speed = speed
-        self.vision = vision
+        self._size = size
+        self._speed = speed
+        self._vision = vision
         self.bounds = bounds
         self.energy = Entity.DEFAULT_ENERGY
         self.heading = self.calculate_initial_heading()
         self.consumed = 0
+        self.update_derived()
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        self._size = value
+        self.update_derived()
+
+    @property
+    def speed(self):
+        return self._speed
+
+    @speed.setter
+    def speed(self, value):
+        self._speed = value
+        self.update_derived()
+
+    @property
+    def vision(self):
+        return self._vision
+
+    @vision.setter
+    def vision(self, value):
+        self._vision = value
+        self.update_derived()
+
+    def update_derived(self):
+        # Traits are fixed for most of an entity's life, so everything computed from them is kept
+        self.energy_cost = self.calculate_energy_cost()
+        self.vision_radius = self._vision * self.VISION_RANGE_MULTIPLIER
+        self.collision_radius = self.ENTITY_RADIUS
 
     def calculate_initial_heading(self):
         # Calculate the initial facing direction towards the center of the canvas
@@ -49,7 +87,7 @@ class Entity:
         self.position.y = max(0, min(self.position.y + delta_y, self.bounds[1]))
 
         # Deduct energy based on movement
-        self.energy -= self.calculate_energy_cost()
+        self.energy -= self.energy_cost
 
     def calculate_energy_cost(self):
         # Define the cost of moving; this can be overridden by subclasses
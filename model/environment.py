@@ -2,14 +2,23 @@
 File name: environment.py
 Author(s): Liam Lawless
 Date created: November 13, 2023
-Last modified: November 25, 2023
+Last modified: October 18, 2026
 
 Description:
     The environment.py file defines the Environment class, which manages the simulation space, orchestrates agent interactions, and maintains the overall state of the natural selection simulation.
 
 """
 
+import numpy as np
+from model.entity import Entity
+from model.spatial_grid import SpatialGrid
+from model.profiler import PROFILER
+from model.trait_statistics import TraitStatistics
+
 class Environment:
+    # Cells roughly match the vision radius of a single point of vision, and are never smaller than a collision
+    GRID_CELL_SIZE = max(Entity.VISION_RANGE_MULTIPLIER, 2 * Entity.ENTITY_RADIUS)
+
     def __init__(self, population, adversaries, food, bounds):
         self.population = population
         self.adversaries = adversaries
@@ -17,37 +26,178 @@ class Environment:
         self.bounds = bounds
         self.next_gen_population = []   # stores all of the agents that have been born in a generation
 
-    def update_environment(self):
-        # Update agents
+        # Agents still acting, safe agents that have yet to reproduce, and safe agents left without the energy to.
+        # Dicts are used as ordered sets so agents are scheduled in population order
+        self.active = {}
+        self.awaiting_reproduction = {}
+        self.stranded = {}
+
+        # Running trait statistics of the population and of the offspring waiting for the next generation
+        self.trait_stats = TraitStatistics()
+        self.trait_stats.rebuild(population)
+        self.offspring_stats = TraitStatistics()
+
+        # Spatial indexes used by every vision and collision query
+        self.agent_grid = SpatialGrid(Environment.GRID_CELL_SIZE)
+        self.adversary_grid = SpatialGrid(Environment.GRID_CELL_SIZE)
+        self.food_grid = SpatialGrid(Environment.GRID_CELL_SIZE)
+        self.reindex()
+
+    def reindex(self):
+        # Rebuild the spatial indexes from scratch, e.g. after the lists were replaced between generations
+        self.agent_grid.rebuild(self.population)
+        self.adversary_grid.rebuild(self.adversaries)
+        self.food_grid.rebuild(self.food)
+        self.food_slots = {food_item: index for index, food_item in enumerate(self.food)}
+        self.food_version = next(SpatialGrid.VERSIONS)  # Changes whenever food is added or removed, so views can skip unchanged food
+        self.rebuild_schedule()
+
+    def rebuild_schedule(self):
+        self.active.clear()
+        self.awaiting_reproduction.clear()
+        self.stranded.clear()
         for agent in self.population:
-            if agent.energy > 0:
+            self.schedule(agent)
+
+    def schedule(self, agent):
+        # File the agent under the set matching its state; agents that are out of energy or have reproduced are finished
+        if agent.is_safe():
+            if not agent.successfully_reproduced:
+                if agent.energy > 0:
+                    self.awaiting_reproduction[agent] = None
+                else:
+                    self.stranded[agent] = None
+        elif agent.energy > 0:
+            self.active[agent] = None
+
+    def unschedule(self, agent):
+        self.active.pop(agent, None)
+        self.awaiting_reproduction.pop(agent, None)
+        self.stranded.pop(agent, None)
+
+    def update_environment(self):
+        # Update agents; safe agents only try to reproduce, the rest share one batched Q-network pass.
+        # Finished agents are in none of the sets, so they cost nothing
+        with PROFILER.phase('reproduction'):
+            for agent in list(self.awaiting_reproduction):
                 agent.perform_action(self)
+            self.awaiting_reproduction.clear()
+
+        acting_agents = list(self.active)
+        actions, states = self.select_actions(acting_agents)
+        with PROFILER.phase('execute_action'):
+            for agent, action, current_state in zip(acting_agents, actions, states):
+                # Skip agents that were cannibalised earlier in the tick
+                if agent not in self.agent_grid:
+                    continue
+
+                if current_state is None:
+                    current_state = agent.get_observation(self)
+                agent.complete_action(action, current_state, self)
+                self.agent_grid.update(agent)
+
+                # Agents only leave the active set when they become safe or run out of energy
+                if agent.energy <= 0 or agent.is_safe():
+                    del self.active[agent]
+                    self.schedule(agent)
 
         # Update adversaries
-        for adversary in self.adversaries:
-            adversary.update()  # Decrease cooldown and recover energy if resting
-            if adversary.energy > 0 and adversary.cooldown == 0:
-                adversary.seek_agents(self.population)
+        with PROFILER.phase('seek_agents'):
+            for adversary in self.adversaries:
+                adversary.update()  # Decrease cooldown and recover energy if resting
+                if adversary.energy > 0 and adversary.cooldown == 0:
+                    adversary.seek_agents(self)
+                    self.adversary_grid.update(adversary)
+
+        with PROFILER.phase('predation'):
+            self.check_for_predation()
+
+    def select_actions(self, agents):
+        # Draw each agent's epsilon greedy choice, then run a single forward pass per network for the greedy ones.
+        # Only greedy agents need their state up front; exploring agents observe theirs right before acting
+        actions = []
+        states = []
+        greedy = {}
+        for agent in agents:
+            action = agent.explore_action()
+            actions.append(action)
+            states.append(None)
+            if action is None:
+                model = agent.inference_model()
+                greedy.setdefault(id(model), (model, []))[1].append(len(actions) - 1)
+
+        for model, indices in greedy.values():
+            with PROFILER.phase('state_building'):
+                batch = np.array([agents[i].get_current_state(self) for i in indices])
+            with PROFILER.phase('inference'):
+                action_values = np.asarray(model(batch, training=False))
+            for row, i in enumerate(indices):
+                states[i] = batch[row].reshape(1, -1)
+                actions[i] = np.argmax(action_values[row])
+
+        return actions, states
 
-        self.check_for_predation()
+    def all_agents_finished(self):
+        # The generation is over once every agent is safe or out of energy, and every safe agent has reproduced
+        return not (self.active or self.awaiting_reproduction or self.stranded)
+
+    def sync_entities(self):
+        # Entities are updated in place here; engines that keep their own state write it back in this hook
+        pass
+
+    def add_agent(self, agent):
+        self.population.append(agent)
+        self.agent_grid.insert(agent)
+        self.trait_stats.add(agent)
+
+    def add_offspring(self, agent):
+        # Offspring join the population at the start of the next generation
+        self.next_gen_population.append(agent)
+        self.offspring_stats.add(agent)
+
+    def retire_generation(self, retired):
+        # Agents that did not make it to the next generation leave the statistics and the offspring join them
+        for agent in retired:
+            self.trait_stats.remove(agent)
+        self.trait_stats.merge(self.offspring_stats)
+        self.offspring_stats.clear()
+
+    def add_food(self, food_item):
+        self.food_slots[food_item] = len(self.food)
+        self.food.append(food_item)
+        self.food_grid.insert(food_item)
+        self.food_version = next(SpatialGrid.VERSIONS)
 
     def remove_food(self, food_item):
-        self.food.remove(food_item)
+        # Move the last food item into the freed slot, so removal never shifts the list
+        index = self.food_slots.pop(food_item)
+        last = self.food.pop()
+        if last is not food_item:
+            self.food[index] = last
+            self.food_slots[last] = index
+        self.food_grid.remove(food_item)
+        self.food_version = next(SpatialGrid.VERSIONS)
 
     def remove_agent(self, agent):
         # Remove the agent from the population
         self.population.remove(agent)
+        self.agent_grid.remove(agent)
+        self.trait_stats.remove(agent)
+        self.unschedule(agent)
 
     def check_for_predation(self):
         for adversary in self.adversaries:
-            for agent in self.population[:]:  # Copy to avoid modification during iteration
-                if adversary.position.distance_to(agent.position) <= adversary.ENTITY_RADIUS + agent.ENTITY_RADIUS and not agent.is_safe():
-
-                    # check if the agent can defend the attack from the adversary
-                    if agent.strength < adversary.attack_power:
-                        # Handle the agent being eaten by the adversary
-                        self.remove_agent(agent)
-                        adversary.consume()
-                        adversary.cooldown = adversary.COOLDOWN_AFTER_EATING
-                    else:
-                        adversary.defended_agents.append(agent)
\ No newline at end of file
+            # Only agents close enough to touch the adversary need to be checked
+            contact_range = adversary.collision_radius + Entity.ENTITY_RADIUS
+            for agent in self.agent_grid.query_radius(adversary.position, contact_range):
+                if agent.is_safe():
+                    continue
+
+                # check if the agent can defend the attack from the adversary
+                if agent.strength < adversary.attack_power:
+                    # Handle the agent being eaten by the adversary
+                    self.remove_agent(agent)
+                    adversary.consume()
+                    adversary.cooldown = adversary.COOLDOWN_AFTER_EATING
+                else:
+                    adversary.defended_agents.add(agent)
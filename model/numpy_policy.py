@@ -0,0 +1,73 @@
+"""
+File name: numpy_policy.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Provides the NumpyQPolicy class, which runs the forward pass of the small Dense Q-network as plain NumPy matrix multiplications so choosing actions needs no TensorFlow call.
+
+"""
+
+import numpy as np
+
+class NumpyQPolicy:
+    def __init__(self, layers, source_model=None):
+        self.layers = layers                # List of (kernel, bias) pairs, ReLU on every layer but the last
+        self.source_model = source_model    # Keras model the weights are refreshed from after training
+
+    @classmethod
+    def from_keras(cls, model):
+        policy = cls([], model)
+        policy.refresh()
+        return policy
+
+    @classmethod
+    def random(cls, state_size, action_size, hidden_size=24, hidden_layers=2):
+        # Freshly initialised network without TensorFlow, using Keras' Dense defaults (Glorot uniform kernels, zero biases)
+        sizes = [state_size] + [hidden_size] * hidden_layers + [action_size]
+        layers = []
+        for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+            limit = np.sqrt(6 / (fan_in + fan_out))
+            layers.append((np.random.uniform(-limit, limit, (fan_in, fan_out)).astype(np.float32), np.zeros(fan_out, dtype=np.float32)))
+        return cls(layers)
+
+    @classmethod
+    def load(cls, path):
+        # Load weights saved with save(), stored as kernel_0, bias_0, kernel_1, ...
+        with np.load(path) as data:
+            layers = [(data[f'kernel_{i}'], data[f'bias_{i}']) for i in range(len(data.files) // 2)]
+        return cls(layers)
+
+    def save(self, path):
+        arrays = {}
+        for i, (kernel, bias) in enumerate(self.layers):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+        np.savez(path, **arrays)
+
+    def get_weights(self):
+        # Flat [kernel, bias, kernel, bias, ...] list in the order Keras' set_weights expects
+        return [array for layer in self.layers for array in layer]
+
+    def refresh(self):
+        # Copy the latest Dense weights out of the Keras model
+        weights = self.source_model.get_weights()
+        self.layers = [(np.asarray(weights[i], dtype=np.float32), np.asarray(weights[i + 1], dtype=np.float32))
+                       for i in range(0, len(weights), 2)]
+
+    def __call__(self, states, training=False):
+        # Works on a single state or a batch of states, mirroring calling the Keras model
+        values = np.asarray(states, dtype=np.float32).reshape(-1, self.layers[0][0].shape[0])
+        last = len(self.layers) - 1
+        for i, (kernel, bias) in enumerate(self.layers):
+            values = values @ kernel + bias
+            if i != last:
+                np.maximum(values, 0, out=values)
+        return values
+
+    def predict(self, states, verbose=0):
+        return self(states)
+
+    def predict_on_batch(self, states):
+        return self(states)
@@ -0,0 +1,42 @@
+"""
+File name: perception.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Provides the Perception class, an agent's cached view of what is within its vision radius: the nearest food, the nearest adversary, the nearest agent it could cannibalize, their squared distances, and whether any other agent is in sight.
+    The state vector, the consume and flee actions and the sensing all read from it. Each part is only recomputed when the agent has moved or the spatial grid it comes from has changed version since it was last surveyed.
+
+"""
+
+class Perception:
+    __slots__ = ('key', 'food_version', 'food', 'food_distance_squared', 'adversary_version', 'adversary',
+                 'adversary_distance_squared', 'agent_version', 'prey', 'prey_distance_squared', 'agent_in_sight')
+
+    def __init__(self):
+        self.key = None  # Position and vision radius the parts were surveyed from
+        self.food_version = self.adversary_version = self.agent_version = None
+
+    def update(self, agent, environment):
+        position = agent.position
+        radius = agent.vision_radius
+        key = (position.x, position.y, radius)
+        moved = key != self.key
+        self.key = key
+
+        food_grid = environment.food_grid
+        if moved or self.food_version != food_grid.version:
+            self.food, self.food_distance_squared, _ = food_grid.survey(position, radius)
+            self.food_version = food_grid.version
+
+        adversary_grid = environment.adversary_grid
+        if moved or self.adversary_version != adversary_grid.version:
+            self.adversary, self.adversary_distance_squared, _ = adversary_grid.survey(position, radius, exclude=agent)
+            self.adversary_version = adversary_grid.version
+
+        agent_grid = environment.agent_grid
+        if moved or self.agent_version != agent_grid.version:
+            self.prey, self.prey_distance_squared, self.agent_in_sight = agent_grid.survey(position, radius, exclude=agent, predicate=agent.can_cannibalize)
+            self.agent_version = agent_grid.version
+        return self
@@ -0,0 +1,23 @@
+"""
+File name: policy_handle.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Provides the PolicyHandle class, a shared reference to a Q-network and its optional NumPy inference copy. Agents hold a handle instead of building their own network, so one model serves the whole population.
+
+"""
+
+class PolicyHandle:
+    def __init__(self, q_network=None, policy=None):
+        self.q_network = q_network  # Keras model that gets trained, may be None for inference only runs
+        self.policy = policy        # Optional NumpyQPolicy used to choose actions
+
+    def inference_model(self):
+        return self.policy if self.policy is not None else self.q_network
+
+    def refresh(self):
+        # Copy freshly trained weights into the NumPy policy
+        if self.policy is not None and self.q_network is not None:
+            self.policy.refresh()
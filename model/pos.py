@@ -2,14 +2,17 @@
 File name: pos.py
 Author(s): Liam Lawless
 Date created: November 10, 2023
-Last modified: November 23, 2023
+Last modified: October 17, 2026
 
 Description:
     This file provides the Pos class, which defines a position with x and y coordinates and supports distance calculations.
+    Positions compare by value. They are mutable, since entities move by updating their position in place, so they are deliberately unhashable.
 
 """
 
 class Pos:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -17,6 +20,13 @@ class Pos:
     def __repr__(self):
         return f"Coordinate(x={self.x}, y={self.y})"
 
+    def __eq__(self, other):
+        if not isinstance(other, Pos):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    __hash__ = None
+
     def tup(self):
         return (self.x, self.y)
 
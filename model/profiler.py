@@ -0,0 +1,99 @@
+"""
+File name: profiler.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Provides the TickProfiler class and the shared PROFILER instance, which time each phase of a tick and of the generation turnover, count distance evaluations and entity scans, and track ticks per second for every generation.
+    Profiling is off by default. While disabled, phase() hands back one shared do-nothing context and counters are skipped behind a single flag check, so the instrumentation costs next to nothing.
+
+"""
+
+import contextlib
+import json
+import time
+from collections import defaultdict, deque
+import numpy as np
+
+NULL_PHASE = contextlib.nullcontext()
+
+class PhaseTimer:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class TickProfiler:
+    SAMPLE_LIMIT = 100000  # Most recent samples kept per phase for the percentiles
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.samples = defaultdict(lambda: deque(maxlen=TickProfiler.SAMPLE_LIMIT))
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.generations = []
+        self.generation_start = None
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def phase(self, name):
+        # Use as `with PROFILER.phase('predation'):`
+        if not self.enabled:
+            return NULL_PHASE
+        return PhaseTimer(self, name)
+
+    def record(self, name, seconds):
+        self.samples[name].append(seconds)
+        self.totals[name] += seconds
+        self.calls[name] += 1
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def start_generation(self):
+        if self.enabled:
+            self.generation_start = time.perf_counter()
+
+    def end_generation(self, generation, ticks):
+        if not self.enabled or self.generation_start is None:
+            return
+        seconds = time.perf_counter() - self.generation_start
+        self.generations.append({'generation': generation, 'ticks': ticks, 'seconds': seconds,
+                                 'ticks_per_second': ticks / seconds if seconds else None})
+        self.generation_start = None
+
+    def summary(self):
+        # Milliseconds per call for every phase, plus the counters and per generation tick rates
+        phases = {}
+        for name, samples in self.samples.items():
+            values = np.fromiter(samples, dtype=float) * 1000
+            phases[name] = {
+                'calls': self.calls[name],
+                'total_ms': self.totals[name] * 1000,
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+                'max_ms': float(values.max()),
+            }
+        return {'phases': phases, 'counters': dict(self.counters), 'generations': list(self.generations)}
+
+    def write_report(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.summary(), file, indent=2)
+
+PROFILER = TickProfiler()
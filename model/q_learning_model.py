@@ -2,49 +2,73 @@
 File name: q_learning_model.py
 Author(s): Liam Lawless
 Date created: November 29, 2023
-Last modified: November 29, 2023
+Last modified: October 17, 2026
 
 Description:
 Provides a Q-learning neural network model and training logic, including the replay buffer mechanism for experience replay, essential for reinforcement learning
+TensorFlow and Keras are imported inside the functions that need them, so importing this module (e.g. for ReplayBuffer) stays fast
 
 """
 
-import tensorflow as tf
-from keras.models import Sequential
-from keras.layers import Dense
 import random
 from collections import deque
 import numpy as np
 
+HIDDEN_LAYER_SIZE = 24
+
 def build_q_network(state_size, action_size, learning_rate=0.001):
+    import tensorflow as tf
+    from keras.models import Sequential
+    from keras.layers import Dense
+
     model = Sequential([
-        Dense(24, input_dim=state_size, activation='relu'),
-        Dense(24, activation='relu'),
+        Dense(HIDDEN_LAYER_SIZE, input_dim=state_size, activation='relu'),
+        Dense(HIDDEN_LAYER_SIZE, activation='relu'),
         Dense(action_size, activation='linear')
     ])
     model.compile(loss='mse', optimizer=tf.keras.optimizers.legacy.Adam(learning_rate))
     return model
 
-def train_q_network(model, replay_buffer, batch_size, discount_factor):
-    minibatch = replay_buffer.sample(batch_size)
-    for state, action, reward, next_state, done in minibatch:
-        # Reshape state and next_state for neural network input
-        state = np.expand_dims(state, axis=0)
-        state = state.reshape(-1, 4)  # Reshape state to 2D with second dimension as 4
-        next_state = np.expand_dims(next_state, axis=0)
+def load_q_network(path):
+    from keras.models import load_model
+    return load_model(path)
+
+def train_q_network(model, replay_buffer, batch_size, discount_factor, target_network=None):
+    # One batched DQN update: stack the minibatch, compute every target with a single forward pass and take one gradient step
+    states, actions, rewards, next_states, dones = replay_buffer.sample_batch(batch_size)
+    dones = dones.astype(np.float32)
+
+    # Bootstrap from the frozen target network when one is given, otherwise from the model itself
+    bootstrap_model = target_network.model if target_network is not None else model
+    next_q_values = np.asarray(bootstrap_model(next_states, training=False))
+    targets = rewards + (1 - dones) * discount_factor * np.amax(next_q_values, axis=1)
 
-        target = reward
-        if not done:
-            target = reward + discount_factor * np.amax(model.predict(next_state)[0])
+    # Only the Q-value of the action that was taken moves towards its target
+    target_f = np.array(model(states, training=False))
+    target_f[np.arange(len(actions)), actions] = targets
+    model.train_on_batch(states, target_f)
 
-        target_f = model.predict(state)
-        target_f = target_f.flatten()  # Flatten to a 1D array
-        target_f[action] = target
-        target_f = target_f.reshape(1, -1)  # Reshape back to (1, 4) for fitting the model
-        model.fit(state, target_f, epochs=1, verbose=0)
+    if target_network is not None:
+        target_network.record_update()
 
+class TargetNetwork:
+    # A frozen copy of a Q-network used to compute bootstrap targets, copied from the online network every sync_interval updates
+    def __init__(self, online_model, sync_interval):
+        self.online_model = online_model
+        self.sync_interval = sync_interval
+        self.updates = 0
+        from keras.models import clone_model
 
+        self.model = clone_model(online_model)
+        self.sync()
 
+    def sync(self):
+        self.model.set_weights(self.online_model.get_weights())
+
+    def record_update(self):
+        self.updates += 1
+        if self.updates % self.sync_interval == 0:
+            self.sync()
 
 class ReplayBuffer:
     def __init__(self, capacity):
@@ -53,5 +77,21 @@ class ReplayBuffer:
     def add(self, state, action, reward, next_state, done):
         self.buffer.append((state, action, reward, next_state, done))
 
+    def __len__(self):
+        return len(self.buffer)
+
     def sample(self, batch_size):
-        return random.sample(self.buffer, batch_size)
\ No newline at end of file
+        return random.sample(self.buffer, batch_size)
+
+    def sample_batch(self, batch_size):
+        # Sample a minibatch and stack it into (states, actions, rewards, next_states, dones) arrays
+        minibatch = self.sample(batch_size)
+        states = np.array([np.reshape(state, -1) for state, _, _, _, _ in minibatch], dtype=np.float32)
+        actions = np.array([action for _, action, _, _, _ in minibatch], dtype=np.int64)
+        rewards = np.array([reward for _, _, reward, _, _ in minibatch], dtype=np.float32)
+        next_states = np.array([np.reshape(next_state, -1) for _, _, _, next_state, _ in minibatch], dtype=np.float32)
+        dones = np.array([done for _, _, _, _, done in minibatch], dtype=bool)
+        return states, actions, rewards, next_states, dones
+
+    def offspring_buffer(self):
+        return ReplayBuffer(self.buffer.maxlen)
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+File name: replay_store.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 18, 2026
+
+Description:
+    Provides the ReplayStore class, a single experience replay ring buffer shared by every agent. Transitions live in preallocated typed arrays, so memory is bounded by the capacity and sampling a minibatch is a vectorized index draw.
+    AgentReplayView exposes one agent's slice of the store with the same add and sample interface as ReplayBuffer.
+
+"""
+
+import numpy as np
+
+class ReplayStore:
+    def __init__(self, capacity, state_size):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.agent_ids = np.full(capacity, -1, dtype=np.int64)
+
+        self.position = 0       # Next slot to write, wrapping around once the store is full
+        self.size = 0
+        self.agent_counts = {}  # Number of stored transitions per agent id
+        self.next_agent_id = 0
+        self.rng = np.random     # Source of the minibatch draws
+
+    def __len__(self):
+        return self.size
+
+    def view(self, agent_id=None):
+        # Return a per agent view, handing out a fresh agent id when none is given
+        if agent_id is None:
+            agent_id = self.next_agent_id
+        self.next_agent_id = max(self.next_agent_id, agent_id + 1)
+        return AgentReplayView(self, agent_id)
+
+    def add(self, agent_id, state, action, reward, next_state, done):
+        i = self.position
+        if self.size == self.capacity:
+            # Only a full store overwrites a transition
+            self.release(int(self.agent_ids[i]), 1)
+
+        self.states[i] = np.reshape(state, -1)
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = np.reshape(next_state, -1)
+        self.dones[i] = done
+        self.agent_ids[i] = agent_id
+        self.agent_counts[agent_id] = self.agent_counts.get(agent_id, 0) + 1
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, agent_ids, states, actions, rewards, next_states, dones):
+        # Write a whole batch of transitions at once, wrapping around the end of the ring
+        count = len(agent_ids)
+        if count == 0:
+            return
+        if count > self.capacity:
+            # Only the newest transitions would survive anyway
+            agent_ids, states, actions, rewards, next_states, dones = (
+                values[-self.capacity:] for values in (agent_ids, states, actions, rewards, next_states, dones))
+            count = self.capacity
+
+        slots = (self.position + np.arange(count)) % self.capacity
+        if self.size + count > self.capacity:
+            self.forget(self.agent_ids[slots])
+
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        self.agent_ids[slots] = agent_ids
+
+        ids, counts = np.unique(agent_ids, return_counts=True)
+        for agent_id, added in zip(ids.tolist(), counts.tolist()):
+            self.agent_counts[agent_id] = self.agent_counts.get(agent_id, 0) + added
+
+        self.position = int((self.position + count) % self.capacity)
+        self.size = min(self.size + count, self.capacity)
+
+    def forget(self, overwritten_ids):
+        # Keep the per agent counts right when old transitions are overwritten
+        overwritten_ids = overwritten_ids[overwritten_ids >= 0]
+        if len(overwritten_ids) == 0:
+            return
+
+        ids, counts = np.unique(overwritten_ids, return_counts=True)
+        for agent_id, removed in zip(ids.tolist(), counts.tolist()):
+            self.release(agent_id, removed)
+
+    def release(self, agent_id, removed):
+        remaining = self.agent_counts[agent_id] - removed
+        if remaining:
+            self.agent_counts[agent_id] = remaining
+        else:
+            del self.agent_counts[agent_id]
+
+    def count_for(self, agent_id):
+        return self.agent_counts.get(agent_id, 0)
+
+    def sample_batch(self, batch_size, agent_id=None):
+        # Draw random slots (with replacement) straight into batch arrays
+        if agent_id is None:
+            indices = self.rng.randint(0, self.size, size=batch_size)
+        else:
+            candidates = np.flatnonzero(self.agent_ids[:self.size] == agent_id)
+            indices = candidates[self.rng.randint(0, len(candidates), size=batch_size)]
+
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices])
+
+    def snapshot(self, rng=None):
+        # Copy of the filled part of the store, to sample from on another thread while this one keeps filling
+        copy = ReplayStore(max(self.size, 1), self.states.shape[1])
+        for name in ('states', 'actions', 'rewards', 'next_states', 'dones', 'agent_ids'):
+            getattr(copy, name)[:self.size] = getattr(self, name)[:self.size]
+        copy.size = self.size
+        copy.position = self.size % copy.capacity
+        copy.agent_counts = dict(self.agent_counts)
+        copy.next_agent_id = self.next_agent_id
+        if rng is not None:
+            copy.rng = rng
+        return copy
+
+    def clear(self):
+        self.agent_ids.fill(-1)
+        self.position = 0
+        self.size = 0
+        self.agent_counts.clear()
+
+class AgentReplayView:
+    # One agent's window onto a shared ReplayStore
+    def __init__(self, store, agent_id):
+        self.store = store
+        self.agent_id = agent_id
+
+    def __len__(self):
+        return self.store.count_for(self.agent_id)
+
+    def add(self, state, action, reward, next_state, done):
+        self.store.add(self.agent_id, state, action, reward, next_state, done)
+
+    def sample_batch(self, batch_size):
+        return self.store.sample_batch(batch_size, self.agent_id)
+
+    def offspring_buffer(self):
+        # Offspring log into the same store under their own id
+        return self.store.view()
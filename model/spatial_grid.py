@@ -0,0 +1,152 @@
+"""
+File name: spatial_grid.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    This file provides the SpatialGrid class, a uniform grid that buckets entities by position so vision and collision checks only look at nearby cells instead of every entity in the environment.
+
+"""
+
+import itertools
+from model.profiler import PROFILER
+
+class SpatialGrid:
+    VERSIONS = itertools.count()  # Shared by every grid so a version number is never handed out twice
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}         # Maps (column, row) to the entities in that cell, kept as an insertion ordered dict
+        self.entity_cells = {}  # Maps each entity to the cell it was last filed under
+        self.version = next(SpatialGrid.VERSIONS)  # Changes whenever an entity is added, removed or moved
+
+    def __len__(self):
+        return len(self.entity_cells)
+
+    def __contains__(self, entity):
+        return entity in self.entity_cells
+
+    def cell_for(self, position):
+        return self.cell_for_coords(position.x, position.y)
+
+    def cell_for_coords(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, entity):
+        cell = self.cell_for(entity.position)
+        self.cells.setdefault(cell, {})[entity] = None
+        self.entity_cells[entity] = cell
+        self.version = next(SpatialGrid.VERSIONS)
+
+    def remove(self, entity):
+        cell = self.entity_cells.pop(entity, None)
+        if cell is None:
+            return
+        self.version = next(SpatialGrid.VERSIONS)
+
+        bucket = self.cells[cell]
+        del bucket[entity]
+        if not bucket:
+            del self.cells[cell]
+
+    def update(self, entity):
+        # Re-file the entity only if it has crossed into a different cell since the last update.
+        # The version changes either way, as distances to the entity have
+        self.version = next(SpatialGrid.VERSIONS)
+        cell = self.cell_for(entity.position)
+        old_cell = self.entity_cells.get(entity)
+        if cell == old_cell:
+            return
+
+        if old_cell is not None:
+            self.remove(entity)
+        self.cells.setdefault(cell, {})[entity] = None
+        self.entity_cells[entity] = cell
+
+    def rebuild(self, entities):
+        self.clear()
+        for entity in entities:
+            self.insert(entity)
+
+    def clear(self):
+        self.cells.clear()
+        self.entity_cells.clear()
+        self.version = next(SpatialGrid.VERSIONS)
+
+    def candidates(self, position, radius):
+        # Yield every entity in the cells overlapped by the square around the circle
+        min_col, min_row = self.cell_for_coords(position.x - radius, position.y - radius)
+        max_col, max_row = self.cell_for_coords(position.x + radius, position.y + radius)
+        counting = PROFILER.enabled
+
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                bucket = self.cells.get((col, row))
+                if bucket:
+                    if counting:
+                        # Every scanned entity costs the caller one distance evaluation (bar an excluded one)
+                        PROFILER.count('entity_scans', len(bucket))
+                        PROFILER.count('distance_evaluations', len(bucket))
+                    yield from bucket
+
+    def query_radius(self, position, radius, exclude=None):
+        # Return all entities within the radius of the position
+        radius_squared = radius * radius
+        found = []
+        for entity in self.candidates(position, radius):
+            if entity is exclude:
+                continue
+            dx = entity.position.x - position.x
+            dy = entity.position.y - position.y
+            if dx * dx + dy * dy <= radius_squared:
+                found.append(entity)
+        return found
+
+    def any_within(self, position, radius, exclude=None):
+        radius_squared = radius * radius
+        for entity in self.candidates(position, radius):
+            if entity is exclude:
+                continue
+            dx = entity.position.x - position.x
+            dy = entity.position.y - position.y
+            if dx * dx + dy * dy <= radius_squared:
+                return True
+        return False
+
+    def nearest(self, position, radius, exclude=None, predicate=None):
+        # Return the closest entity within the radius (optionally matching the predicate), or None
+        closest = None
+        closest_distance_squared = radius * radius
+        for entity in self.candidates(position, radius):
+            if entity is exclude or (predicate is not None and not predicate(entity)):
+                continue
+            dx = entity.position.x - position.x
+            dy = entity.position.y - position.y
+            distance_squared = dx * dx + dy * dy
+            if distance_squared <= closest_distance_squared and (closest is None or distance_squared < closest_distance_squared):
+                closest = entity
+                closest_distance_squared = distance_squared
+        return closest
+
+    def survey(self, position, radius, exclude=None, predicate=None):
+        # One pass that returns the closest entity matching the predicate, its squared distance, and whether any entity is in range
+        radius_squared = radius * radius
+        closest = None
+        closest_distance_squared = None
+        in_range = False
+        for entity in self.candidates(position, radius):
+            if entity is exclude:
+                continue
+            dx = entity.position.x - position.x
+            dy = entity.position.y - position.y
+            distance_squared = dx * dx + dy * dy
+            if distance_squared > radius_squared:
+                continue
+            in_range = True
+            if predicate is not None and not predicate(entity):
+                continue
+            if closest is None or distance_squared < closest_distance_squared:
+                closest = entity
+                closest_distance_squared = distance_squared
+        return closest, closest_distance_squared, in_range
@@ -0,0 +1,130 @@
+"""
+File name: trait_statistics.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Keeps running statistics of the agents' traits as agents are added and removed, so the mean, variance, extremes and distribution of each trait can be read at any tick without a pass over the population.
+    Means and variances use Welford's online algorithm, and every trait also keeps a histogram with one bin per 0.1, the resolution traits are rounded to when they mutate.
+
+"""
+
+import math
+import numpy as np
+
+AGENT_TRAITS = ('size', 'speed', 'vision', 'strength')
+
+class RunningStatistics:
+    # Statistics of a single trait
+    BIN_WIDTH = 0.1
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0                               # Sum of squared differences from the mean
+        self.counts = np.zeros(64, dtype=np.int64)  # Histogram, bin i holds the values that round to i * BIN_WIDTH
+
+    def bin_for(self, value):
+        return int(round(value / RunningStatistics.BIN_WIDTH))
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        i = self.bin_for(value)
+        if i >= len(self.counts):
+            self.counts = np.concatenate((self.counts, np.zeros(max(i + 1, 2 * len(self.counts)) - len(self.counts), dtype=np.int64)))
+        self.counts[i] += 1
+
+    def remove(self, value):
+        # Welford's update run backwards
+        if self.count <= 1:
+            self.clear()
+            return
+        self.count -= 1
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(self.m2 - delta * (value - self.mean), 0.0)
+        self.counts[self.bin_for(value)] -= 1
+
+    def merge(self, other):
+        # Combine two sets of statistics (Chan et al.), e.g. when a generation's offspring join the population
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+
+        if len(other.counts) > len(self.counts):
+            self.counts = np.concatenate((self.counts, np.zeros(len(other.counts) - len(self.counts), dtype=np.int64)))
+        self.counts[:len(other.counts)] += other.counts
+
+    def clear(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.counts.fill(0)
+
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    def minimum(self):
+        occupied = np.flatnonzero(self.counts)
+        return occupied[0] * RunningStatistics.BIN_WIDTH if len(occupied) else math.nan
+
+    def maximum(self):
+        occupied = np.flatnonzero(self.counts)
+        return occupied[-1] * RunningStatistics.BIN_WIDTH if len(occupied) else math.nan
+
+    def percentile(self, q):
+        # Nearest rank percentile read off the histogram
+        if self.count == 0:
+            return math.nan
+        rank = max(1, math.ceil(q / 100 * self.count))
+        return int(np.searchsorted(np.cumsum(self.counts), rank)) * RunningStatistics.BIN_WIDTH
+
+    def histogram(self):
+        # Bin edges and counts up to the highest occupied bin, centred on the 0.1 trait values
+        occupied = np.flatnonzero(self.counts)
+        counts = self.counts[:occupied[-1] + 1] if len(occupied) else self.counts[:0]
+        edges = (np.arange(len(counts) + 1) - 0.5) * RunningStatistics.BIN_WIDTH
+        return edges, counts.copy()
+
+class TraitStatistics:
+    # Running statistics for every trait of a group of agents
+    def __init__(self, traits=AGENT_TRAITS):
+        self.traits = {trait: RunningStatistics() for trait in traits}
+
+    def __getitem__(self, trait):
+        return self.traits[trait]
+
+    @property
+    def count(self):
+        return next(iter(self.traits.values())).count
+
+    def add(self, agent):
+        for trait, statistics in self.traits.items():
+            statistics.add(getattr(agent, trait))
+
+    def remove(self, agent):
+        for trait, statistics in self.traits.items():
+            statistics.remove(getattr(agent, trait))
+
+    def merge(self, other):
+        for trait, statistics in self.traits.items():
+            statistics.merge(other.traits[trait])
+
+    def clear(self):
+        for statistics in self.traits.values():
+            statistics.clear()
+
+    def rebuild(self, agents):
+        # Start over from a known population, e.g. one restored from a checkpoint
+        self.clear()
+        for agent in agents:
+            self.add(agent)
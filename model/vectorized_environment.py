@@ -0,0 +1,625 @@
+"""
+File name: vectorized_environment.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 18, 2026
+
+Description:
+    This file provides the VectorizedEnvironment class, an optional engine that keeps the world state in contiguous NumPy arrays and advances every agent, adversary and food item with batched array operations each tick.
+    The population, adversaries and food lists of the regular Environment are kept as a facade over the arrays: entities are packed into the arrays when the environment is reindexed, eaten entities are dropped from the lists as they die, and the remaining per entity values are written back with sync_entities().
+
+    Agents act simultaneously within a tick rather than one after another, so two agents reaching the same food on the same tick are resolved in population order.
+
+"""
+
+import math
+import numpy as np
+from model.agent import Agent
+from model.adversary import Adversary
+from model.entity import Entity
+from model.environment import Environment
+from model.food import Food
+from model.profiler import PROFILER
+from model.spatial_grid import SpatialGrid
+
+WANDER, FLEE, REPRODUCE, CONSUME = range(4)
+
+REWARD_FOOD_CONSUMED = 15
+REWARD_SURVIVED_ADVERSARY = 5
+PENALTY_LOST_ENERGY = -1
+PENALTY_CAUGHT_BY_ADVERSARY = -20
+PENALTY_FAILED_REPRODUCTION = -5
+
+def neighbour_offsets(span):
+    # Column and row offsets (from -span) of every cell up to span cells away, the query's own cell first
+    d_col, d_row = np.meshgrid(np.arange(2 * span + 1), np.arange(2 * span + 1), indexing='ij')
+    order = np.argsort((d_col.ravel() - span) ** 2 + (d_row.ravel() - span) ** 2, kind='stable')
+    return d_col.ravel()[order], d_row.ravel()[order]
+
+class TargetGrid:
+    # Targets bucketed into a uniform grid and sorted by cell once, so every query in a tick can share the sort.
+    # Queries visit only the cells their radius reaches and compare against the targets' current positions;
+    # every cell is widened by the furthest any target moved since the grid was built, so moved targets are still found
+    PROBES = 4    # Targets per cell any_within tries one at a time before listing the rest
+    CROWDED = 4   # Targets a cell as wide as the reach would hold on average before cells are halved
+
+    def __init__(self, target_x, target_y, reach, bounds):
+        # Cells as wide as the largest expected query radius plus movement, so queries search the 3x3 cells around them.
+        # Crowded cells are halved, searching 5x5 smaller cells so fewer out of range targets are compared, but never
+        # below one target's share of the world, which keeps the cell table about as long as the targets
+        share = bounds[0] * bounds[1] / max(len(target_x), 1)
+        self.cell_size = max(reach / 2 if reach ** 2 > TargetGrid.CROWDED * share else reach, 1.0, math.sqrt(share))
+        self.x = target_x.copy()
+        self.y = target_y.copy()
+
+        self.columns = math.floor(bounds[0] / self.cell_size) + 1
+        self.rows = math.floor(bounds[1] / self.cell_size) + 1
+        keys = self.keys(*self.cells(target_x, target_y))
+        self.order = np.argsort(keys, kind='stable')
+        self.cell_start = np.zeros(self.columns * self.rows + 1, dtype=np.int64)  # Targets of cell k are order[cell_start[k]:cell_start[k + 1]]
+        np.cumsum(np.bincount(keys, minlength=self.columns * self.rows), out=self.cell_start[1:])
+
+    def cells(self, x, y):
+        return np.floor(x / self.cell_size).astype(np.int64), np.floor(y / self.cell_size).astype(np.int64)
+
+    def keys(self, col, row):
+        return col * self.rows + row
+
+    def drift(self, target_x, target_y):
+        # Furthest any target moved along either axis since the grid was built
+        return max(float(np.max(np.abs(target_x - self.x), initial=0)), float(np.max(np.abs(target_y - self.y), initial=0)))
+
+    def search_span(self, radius, drift):
+        return math.ceil((float(np.max(radius, initial=0)) + drift) / self.cell_size)
+
+    def neighbours(self, query_x, query_y, radius, drift, span, d_col, d_row):
+        # Every (query, cell offset) pair whose cell the query's radius reaches, as (query index, start, count) of the targets in the cell
+        col, row = self.cells(query_x, query_y)
+        steps = np.arange(-span, span + 1)
+
+        # Gap along each axis between the query and the cells span either side of it, widened by the drift on every side
+        cell_x = (col[:, None] + steps) * self.cell_size
+        cell_y = (row[:, None] + steps) * self.cell_size
+        gap_x = np.maximum(np.maximum(cell_x - drift - query_x[:, None], query_x[:, None] - cell_x - self.cell_size - drift), 0) ** 2
+        gap_y = np.maximum(np.maximum(cell_y - drift - query_y[:, None], query_y[:, None] - cell_y - self.cell_size - drift), 0) ** 2
+        gap_x[(col[:, None] + steps < 0) | (col[:, None] + steps >= self.columns)] = np.inf
+        gap_y[(row[:, None] + steps < 0) | (row[:, None] + steps >= self.rows)] = np.inf
+
+        queries, offsets = np.nonzero(gap_x[:, d_col] + gap_y[:, d_row] <= radius[:, None] ** 2)
+        keys = self.keys(col[queries] + d_col[offsets] - span, row[queries] + d_row[offsets] - span)
+        start = self.cell_start[keys]
+        return queries, start, self.cell_start[keys + 1] - start
+
+    def expand(self, start, counts):
+        # One row per target in each range, as (range index, target index)
+        total = int(counts.sum())
+        if PROFILER.enabled:
+            PROFILER.count('entity_scans', total)
+            PROFILER.count('distance_evaluations', total)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(np.arange(len(start)), counts), self.order[np.repeat(start, counts) + offsets]
+
+    def pairs(self, query_x, query_y, radius, target_x, target_y):
+        # Return (query index, target index, squared distance) for every target within each query's radius
+        drift = self.drift(target_x, target_y)
+        span = self.search_span(radius, drift)
+        queries, start, counts = self.neighbours(query_x, query_y, radius, drift, span, *neighbour_offsets(span))
+        query_index, target_index = self.expand(start, counts)
+        query_index = queries[query_index]
+        distance_squared = (target_x[target_index] - query_x[query_index]) ** 2 + (target_y[target_index] - query_y[query_index]) ** 2
+        keep = distance_squared <= radius[query_index] ** 2
+        return query_index[keep], target_index[keep], distance_squared[keep]
+
+    def any_within(self, query_x, query_y, radius, target_x, target_y, eligible=None, exclude=None):
+        # Whether each query has an eligible target within its radius, ignoring the target index in exclude.
+        # The queries' own cells are searched first and the cells around them only for the queries still without one,
+        # and each cell's first few targets are tried one at a time before the rest are listed, which settles most queries in crowded cells
+        present = np.zeros(len(query_x), dtype=bool)
+
+        def mark(query_index, target_index):
+            hit = (target_x[target_index] - query_x[query_index]) ** 2 + (target_y[target_index] - query_y[query_index]) ** 2 <= radius[query_index] ** 2
+            if eligible is not None:
+                hit &= eligible[target_index]
+            if exclude is not None:
+                hit &= target_index != exclude[query_index]
+            present[query_index[hit]] = True
+
+        def search(queries, start, counts):
+            for probe in range(TargetGrid.PROBES):
+                probing = np.flatnonzero((counts > probe) & ~present[queries])
+                if len(probing) == 0:
+                    break
+                if PROFILER.enabled:
+                    PROFILER.count('entity_scans', len(probing))
+                    PROFILER.count('distance_evaluations', len(probing))
+                mark(queries[probing], self.order[start[probing] + probe])
+
+            searching = np.flatnonzero((counts > TargetGrid.PROBES) & ~present[queries])
+            query_index, target_index = self.expand(start[searching] + TargetGrid.PROBES, counts[searching] - TargetGrid.PROBES)
+            mark(queries[searching[query_index]], target_index)
+
+        # Every radius reaches the query's own cell
+        keys = self.keys(*self.cells(query_x, query_y))
+        start = self.cell_start[keys]
+        search(np.arange(len(query_x)), start, self.cell_start[keys + 1] - start)
+
+        pending = np.flatnonzero(~present)
+        if len(pending) > 0:
+            drift = self.drift(target_x, target_y)
+            span = self.search_span(radius[pending], drift)
+            d_col, d_row = neighbour_offsets(span)
+            queries, start, counts = self.neighbours(query_x[pending], query_y[pending], radius[pending], drift, span, d_col[1:], d_row[1:])
+            search(pending[queries], start, counts)
+        return present
+
+def pairs_within(query_x, query_y, radius, target_x, target_y):
+    # Return (query index, target index, squared distance) for every target within each query's radius,
+    # using a grid built for this one query
+    if len(query_x) == 0 or len(target_x) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    bounds = (max(float(np.max(target_x)), float(np.max(query_x))), max(float(np.max(target_y)), float(np.max(query_y))))
+    return TargetGrid(target_x, target_y, float(np.max(radius)), bounds).pairs(query_x, query_y, radius, target_x, target_y)
+
+def nearest_from_pairs(num_queries, query_index, target_index, distance_squared):
+    # Reduce candidate pairs to the closest target per query (-1 where nothing was found)
+    nearest = np.full(num_queries, -1, dtype=np.int64)
+    nearest_distance_squared = np.full(num_queries, np.inf)
+    if len(query_index) == 0:
+        return nearest, nearest_distance_squared
+
+    # Equal distances go to the lowest target index, whatever order the pairs were found in
+    order = np.lexsort((target_index, distance_squared, query_index))
+    sorted_queries = query_index[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_queries[1:] != sorted_queries[:-1]
+    chosen = order[first]
+    nearest[query_index[chosen]] = target_index[chosen]
+    nearest_distance_squared[query_index[chosen]] = distance_squared[chosen]
+    return nearest, nearest_distance_squared
+
+class VectorizedEnvironment(Environment):
+    def __init__(self, population, adversaries, food, bounds, record_experience=True):
+        self.record_experience = record_experience  # Store every acting agent's transition in its replay buffer
+        self.agent_state = {}
+        self.adversary_state = {}
+        self.food_state = {}
+        self.agent_objects = []
+        self.replay_store = None
+        self.uid_count = 1
+        self.defended = np.zeros((0, 1), dtype=bool)  # [adversary, agent uid] is set once the agent fought the adversary off
+        self.grids = {}  # TargetGrid per 'agent', 'adversary' and 'food', shared by the agents' queries within a tick
+        super().__init__(population, adversaries, food, bounds)
+
+    def reindex(self):
+        # Pack the entity objects into the arrays; called whenever the lists were rebuilt
+        super().reindex()
+        self.grids = {}
+
+        population = self.population
+        self.agent_state = {
+            'x': np.array([agent.position.x for agent in population], dtype=float),
+            'y': np.array([agent.position.y for agent in population], dtype=float),
+            'heading': np.array([agent.heading for agent in population], dtype=float),
+            'energy': np.array([agent.energy for agent in population], dtype=float),
+            'size': np.array([agent.size for agent in population], dtype=float),
+            'speed': np.array([agent.speed for agent in population], dtype=float),
+            'vision': np.array([agent.vision for agent in population], dtype=float),
+            'strength': np.array([agent.strength for agent in population], dtype=float),
+            'energy_cost': np.array([agent.energy_cost for agent in population], dtype=float),
+            'consumed': np.array([agent.consumed for agent in population], dtype=np.int64),
+            'satisfied': np.array([agent.satisfied for agent in population], dtype=bool),
+            'at_edge': np.array([agent.at_edge for agent in population], dtype=bool),
+            'reproduced': np.array([agent.successfully_reproduced for agent in population], dtype=bool),
+            'epsilon': np.array([agent.epsilon for agent in population], dtype=float),
+            'alive': np.ones(len(population), dtype=bool),
+            'uid': np.arange(len(population), dtype=np.int64),
+        }
+
+        adversaries = self.adversaries
+        self.adversary_state = {
+            'x': np.array([adversary.position.x for adversary in adversaries], dtype=float),
+            'y': np.array([adversary.position.y for adversary in adversaries], dtype=float),
+            'heading': np.array([adversary.heading for adversary in adversaries], dtype=float),
+            'energy': np.array([adversary.energy for adversary in adversaries], dtype=float),
+            'speed': np.array([adversary.speed for adversary in adversaries], dtype=float),
+            'vision': np.array([adversary.vision for adversary in adversaries], dtype=float),
+            'energy_cost': np.array([adversary.energy_cost for adversary in adversaries], dtype=float),
+            'attack_power': np.array([adversary.attack_power for adversary in adversaries], dtype=float),
+            'cooldown': np.array([adversary.cooldown for adversary in adversaries], dtype=np.int64),
+            'consumed': np.array([adversary.consumed for adversary in adversaries], dtype=np.int64),
+        }
+
+        self.food_state = {
+            'x': np.array([food_item.position.x for food_item in self.food], dtype=float),
+            'y': np.array([food_item.position.y for food_item in self.food], dtype=float),
+            'alive': np.ones(len(self.food), dtype=bool),
+        }
+
+        # Log transitions straight into the replay store when every agent writes to views on the same one
+        stores = {id(getattr(agent.replay_buffer, 'store', None)) for agent in population}
+        self.replay_store = population[0].replay_buffer.store if len(stores) == 1 and hasattr(population[0].replay_buffer, 'store') else None
+        if self.replay_store is not None:
+            self.agent_state['replay_id'] = np.array([agent.replay_buffer.agent_id for agent in population], dtype=np.int64)
+
+        # Agents keep their uid for the whole generation so defended attacks survive compaction
+        self.agent_objects = list(population)
+        self.uid_count = max(len(population), 1)
+        uids = {agent: uid for uid, agent in enumerate(population)}
+        self.defended = np.zeros((len(adversaries), self.uid_count), dtype=bool)
+        for adversary_index, adversary in enumerate(adversaries):
+            for agent in adversary.defended_agents:
+                if agent in uids:
+                    self.defended[adversary_index, uids[agent]] = True
+
+    def rebuild_schedule(self):
+        # Which agents are still acting is read straight off the masks in agent_state
+        pass
+
+    def sync_entities(self):
+        # Write the array state back onto the entity objects behind the facade lists
+        agents = self.agent_state
+        for i, agent in enumerate(self.population):
+            agent.position.x = float(agents['x'][i])
+            agent.position.y = float(agents['y'][i])
+            agent.heading = float(agents['heading'][i])
+            agent.energy = float(agents['energy'][i])
+            agent.consumed = int(agents['consumed'][i])
+            agent.satisfied = bool(agents['satisfied'][i])
+            agent.at_edge = bool(agents['at_edge'][i])
+            agent.successfully_reproduced = bool(agents['reproduced'][i])
+            agent.epsilon = float(agents['epsilon'][i])
+
+        adversaries = self.adversary_state
+        defended_by, defended_uids = np.nonzero(self.defended)
+        for i, adversary in enumerate(self.adversaries):
+            adversary.position.x = float(adversaries['x'][i])
+            adversary.position.y = float(adversaries['y'][i])
+            adversary.heading = float(adversaries['heading'][i])
+            adversary.energy = float(adversaries['energy'][i])
+            adversary.cooldown = int(adversaries['cooldown'][i])
+            adversary.consumed = int(adversaries['consumed'][i])
+            adversary.defended_agents = {self.agent_objects[uid] for uid in defended_uids[defended_by == i]}
+        # The object level spatial indexes are left as reindex() built them; nothing in this engine queries them,
+        # and rebuilding them here would cost more than the write back on every drawn or recorded frame
+
+    def all_agents_finished(self):
+        agents = self.agent_state
+        safe = agents['satisfied'] & agents['at_edge']
+        if np.all(safe | (agents['energy'] <= 0)):
+            return bool(np.all(agents['reproduced'][safe]))
+        return False
+
+    def update_environment(self):
+        self.update_agents()
+        with PROFILER.phase('seek_agents'):
+            self.update_adversaries()
+        with PROFILER.phase('predation'):
+            self.check_for_predation()
+        self.remove_dead()
+
+    def update_agents(self):
+        agents = self.agent_state
+        safe = agents['satisfied'] & agents['at_edge']
+
+        # Safe agents only try to reproduce once
+        with PROFILER.phase('reproduction'):
+            for i in np.flatnonzero(safe & ~agents['reproduced'] & (agents['energy'] > 0)):
+                agent = self.population[i]
+                agent.position.x = float(agents['x'][i])
+                agent.position.y = float(agents['y'][i])
+                agent.reproduce(self)
+                agents['reproduced'][i] = True
+
+        acting = np.flatnonzero(~safe & (agents['energy'] > 0))
+        if len(acting) == 0:
+            return
+
+        # Sort the targets at most once per tick; both state builds and the food and flee searches reuse the grids
+        self.grids = {}
+
+        with PROFILER.phase('state_building'):
+            current_state = self.build_states(acting)
+        with PROFILER.phase('inference'):
+            actions = self.choose_actions(acting, current_state)
+        with PROFILER.phase('execute_action'):
+            self.execute_actions(acting, current_state, actions)
+
+    def execute_actions(self, acting, current_state, actions):
+        agents = self.agent_state
+        rewards = np.zeros(len(acting))
+
+        wandering = actions == WANDER
+        self.wander_entities(agents, acting[wandering])
+
+        fleeing = actions == FLEE
+        evaded = self.flee_from_closest_adversary(acting[fleeing])
+        rewards[fleeing] = np.where(evaded, REWARD_SURVIVED_ADVERSARY, PENALTY_CAUGHT_BY_ADVERSARY)
+
+        # Agents that are not safe can never reproduce, so the reproduce action only costs them
+        rewards[actions == REPRODUCE] = PENALTY_FAILED_REPRODUCTION
+
+        consuming = actions == CONSUME
+        ate = self.consume_closest_food(acting[consuming])
+        rewards[consuming] = np.where(ate, REWARD_FOOD_CONSUMED, PENALTY_LOST_ENERGY)
+
+        # Deduct energy cost for all actions except wandering, which is never rewarded
+        rewards[~wandering] += PENALTY_LOST_ENERGY * agents['energy_cost'][acting[~wandering]]
+        agents['reproduced'][acting] = False
+
+        if self.record_experience:
+            self.store_experience(acting, current_state, actions, rewards)
+
+        # Update epsilon with decay only if it's above the minimum threshold
+        epsilon = agents['epsilon']
+        epsilon[epsilon > Agent.EPSILON_MIN] *= Agent.EPSILON_DECAY
+
+    def target_grid(self, kind, radius):
+        # The grid of one kind of entity for this tick. Entities that moved since it was built are still found,
+        # so it is only rebuilt once the arrays were compacted
+        state = {'agent': self.agent_state, 'adversary': self.adversary_state, 'food': self.food_state}[kind]
+        grid = self.grids.get(kind)
+        if grid is None or len(grid.x) != len(state['x']):
+            # Leave room for entities to move twice in a tick (an agent's action, then heading home)
+            margin = 2 * float(np.max(state['speed'], initial=0)) if 'speed' in state else 0.0
+            grid = TargetGrid(state['x'], state['y'], radius + margin, self.bounds)
+            self.grids[kind] = grid
+        return grid
+
+    def build_states(self, indices):
+        agents = self.agent_state
+        x = agents['x'][indices]
+        y = agents['y'][indices]
+        vision_radius = agents['vision'][indices] * Entity.VISION_RANGE_MULTIPLIER
+        largest = float(np.max(agents['vision'], initial=0)) * Entity.VISION_RANGE_MULTIPLIER
+
+        food = self.food_state
+        has_food = self.target_grid('food', largest).any_within(x, y, vision_radius, food['x'], food['y'], eligible=food['alive'])
+
+        adversaries = self.adversary_state
+        has_adversary = self.target_grid('adversary', largest).any_within(x, y, vision_radius, adversaries['x'], adversaries['y'])
+
+        has_agent = self.target_grid('agent', largest).any_within(x, y, vision_radius, agents['x'], agents['y'], eligible=agents['alive'], exclude=indices)
+
+        energy = np.round(agents['energy'][indices] / Agent.DEFAULT_ENERGY, 2)
+        return np.column_stack((energy, has_food, has_adversary, has_agent)).astype(float)
+
+    def choose_actions(self, indices, states):
+        # Epsilon greedy over the whole batch, with one forward pass per distinct network
+        actions = np.random.randint(0, Agent.ACTION_SIZE, size=len(indices))
+        greedy = np.random.rand(len(indices)) > self.agent_state['epsilon'][indices]
+        if not np.any(greedy):
+            return actions
+
+        networks = {}
+        for position in np.flatnonzero(greedy):
+            network = self.population[indices[position]].inference_model()
+            networks.setdefault(id(network), (network, []))[1].append(position)
+
+        for network, positions in networks.values():
+            action_values = np.asarray(network(states[positions], training=False))
+            actions[positions] = np.argmax(action_values, axis=1)
+        return actions
+
+    def move(self, state, indices, delta_x, delta_y):
+        # Normalise the direction, scale it by speed, clamp to the bounds and pay the energy cost
+        moving = state['energy'][indices] > 0
+        indices = indices[moving]
+        delta_x = delta_x[moving]
+        delta_y = delta_y[moving]
+
+        magnitude = np.sqrt(delta_x ** 2 + delta_y ** 2)
+        scale = np.where(magnitude != 0, state['speed'][indices] / np.where(magnitude != 0, magnitude, 1), 1)
+
+        state['x'][indices] = np.clip(state['x'][indices] + delta_x * scale, 0, self.bounds[0])
+        state['y'][indices] = np.clip(state['y'][indices] + delta_y * scale, 0, self.bounds[1])
+        state['energy'][indices] -= state['energy_cost'][indices]
+
+    def wander_entities(self, state, indices):
+        indices = indices[state['energy'][indices] > 0]
+        heading = state['heading'][indices] + np.random.uniform(-Entity.MAX_ANGLE_CHANGE, Entity.MAX_ANGLE_CHANGE, len(indices))
+        delta_x = np.cos(heading)
+        delta_y = np.sin(heading)
+
+        # If the entity would hit a boundary, reflect the heading off the boundary
+        new_x = np.clip(state['x'][indices] + delta_x, 0, self.bounds[0])
+        new_y = np.clip(state['y'][indices] + delta_y, 0, self.bounds[1])
+        heading = np.where((new_x == 0) | (new_x == self.bounds[0]), math.pi - heading, heading)
+        heading = np.where((new_y == 0) | (new_y == self.bounds[1]), -heading, heading)
+        state['heading'][indices] = heading % (2 * math.pi)
+
+        self.move(state, indices, delta_x, delta_y)
+
+    def move_entities_towards(self, state, indices, target_x, target_y):
+        direction = np.arctan2(target_y - state['y'][indices], target_x - state['x'][indices])
+        state['heading'][indices] = direction
+        self.move(state, indices, np.cos(direction), np.sin(direction))
+
+    def flee_from_closest_adversary(self, indices):
+        agents = self.agent_state
+        adversaries = self.adversary_state
+        x = agents['x'][indices]
+        y = agents['y'][indices]
+        vision_radius = agents['vision'][indices] * Entity.VISION_RANGE_MULTIPLIER
+        grid = self.target_grid('adversary', float(np.max(vision_radius, initial=0)))
+        closest, _ = nearest_from_pairs(len(indices), *grid.pairs(x, y, vision_radius, adversaries['x'], adversaries['y']))
+
+        # Set the heading directly opposite the closest adversary
+        evaded = closest >= 0
+        fleeing = indices[evaded]
+        direction = np.arctan2(adversaries['y'][closest[evaded]] - y[evaded], adversaries['x'][closest[evaded]] - x[evaded])
+        heading = (direction + math.pi) % (2 * math.pi)
+        agents['heading'][fleeing] = heading
+        self.move(agents, fleeing, np.cos(heading), np.sin(heading))
+        return evaded
+
+    def consume_closest_food(self, indices):
+        agents = self.agent_state
+        food = self.food_state
+        count = len(indices)
+        x = agents['x'][indices]
+        y = agents['y'][indices]
+        vision_radius = agents['vision'][indices] * Entity.VISION_RANGE_MULTIPLIER
+
+        largest = float(np.max(vision_radius, initial=0))
+        query_index, target_index, distance_squared = self.target_grid('food', largest).pairs(x, y, vision_radius, food['x'], food['y'])
+        available = food['alive'][target_index]
+        closest_food, food_distance_squared = nearest_from_pairs(count, query_index[available], target_index[available], distance_squared[available])
+
+        # Only other agents that are sufficiently smaller can be eaten
+        query_index, target_index, distance_squared = self.target_grid('agent', largest).pairs(x, y, vision_radius, agents['x'], agents['y'])
+        edible = (target_index != indices[query_index]) & agents['alive'][target_index] & \
+            (agents['size'][indices[query_index]] - agents['size'][target_index] >= 0.75)
+        closest_agent, agent_distance_squared = nearest_from_pairs(count, query_index[edible], target_index[edible], distance_squared[edible])
+
+        # Go to whichever is closer, preferring food on ties
+        chase_agent = (closest_agent >= 0) & (agent_distance_squared < food_distance_squared)
+        chase_food = (closest_food >= 0) & ~chase_agent
+
+        target_x = np.zeros(count)
+        target_y = np.zeros(count)
+        target_x[chase_agent] = agents['x'][closest_agent[chase_agent]]
+        target_y[chase_agent] = agents['y'][closest_agent[chase_agent]]
+        target_x[chase_food] = food['x'][closest_food[chase_food]]
+        target_y[chase_food] = food['y'][closest_food[chase_food]]
+        moving = chase_agent | chase_food
+        self.move_entities_towards(agents, indices[moving], target_x[moving], target_y[moving])
+
+        # Resolve eating in population order so a food item or prey can only be eaten once
+        ate = np.zeros(count, dtype=bool)
+        for position in np.flatnonzero(moving):
+            i = indices[position]
+            if not agents['alive'][i]:
+                continue
+
+            if chase_agent[position]:
+                prey = closest_agent[position]
+                if not agents['alive'][prey]:
+                    continue
+                reach = Entity.ENTITY_RADIUS + Entity.ENTITY_RADIUS
+                distance_squared = (agents['x'][i] - agents['x'][prey]) ** 2 + (agents['y'][i] - agents['y'][prey]) ** 2
+            else:
+                prey = closest_food[position]
+                if not food['alive'][prey]:
+                    continue
+                reach = Entity.ENTITY_RADIUS + agents['size'][i] + Food.ENTITY_RADIUS
+                distance_squared = (agents['x'][i] - food['x'][prey]) ** 2 + (agents['y'][i] - food['y'][prey]) ** 2
+
+            if distance_squared <= reach ** 2:
+                if chase_agent[position]:
+                    agents['alive'][prey] = False
+                else:
+                    food['alive'][prey] = False
+                agents['consumed'][i] += 1
+                ate[position] = True
+
+        # Tell the agent to return home if it has eaten 2 food
+        satisfied = indices[agents['alive'][indices] & (agents['consumed'][indices] >= 2)]
+        agents['satisfied'][satisfied] = True
+        self.return_home(satisfied)
+        return ate
+
+    def return_home(self, indices):
+        agents = self.agent_state
+        x = agents['x'][indices]
+        y = agents['y'][indices]
+
+        # Closest of the left, right, top and bottom edges, taken in that order on ties
+        edge_distances = np.column_stack((x, self.bounds[0] - x, y, self.bounds[1] - y))
+        closest_edge = np.argmin(edge_distances, axis=1) if len(indices) else np.empty(0, dtype=np.int64)
+        distance = edge_distances[np.arange(len(indices)), closest_edge]
+
+        # Check if the agent is already at the edge
+        at_edge = distance < Entity.ENTITY_RADIUS
+        agents['at_edge'][indices[at_edge]] = True
+
+        moving = ~at_edge
+        edge = closest_edge[moving]
+        target_x = np.select([edge == 0, edge == 1], [0, self.bounds[0]], x[moving])
+        target_y = np.select([edge == 2, edge == 3], [0, self.bounds[1]], y[moving])
+        self.move_entities_towards(agents, indices[moving], target_x, target_y)
+
+    def update_adversaries(self):
+        state = self.adversary_state
+        if len(state['x']) == 0:
+            return
+
+        # Decrease cooldown over time
+        state['cooldown'][state['cooldown'] > 0] -= 1
+        seeking = np.flatnonzero((state['energy'] > 0) & (state['cooldown'] == 0))
+
+        agents = self.agent_state
+        x = state['x'][seeking]
+        y = state['y'][seeking]
+        vision_radius = state['vision'][seeking] * Entity.VISION_RANGE_MULTIPLIER
+        query_index, target_index, distance_squared = pairs_within(x, y, vision_radius, agents['x'], agents['y'])
+
+        # Filter out safe or eaten agents and agents that already defended against this adversary
+        targetable = agents['alive'][target_index] & ~(agents['satisfied'][target_index] & agents['at_edge'][target_index])
+        targetable &= ~self.defended[seeking[query_index], agents['uid'][target_index]]
+        closest, _ = nearest_from_pairs(len(seeking), query_index[targetable], target_index[targetable], distance_squared[targetable])
+
+        chasing = closest >= 0
+        self.move_entities_towards(state, seeking[chasing], agents['x'][closest[chasing]], agents['y'][closest[chasing]])
+        self.wander_entities(state, seeking[~chasing])
+
+    def check_for_predation(self):
+        state = self.adversary_state
+        agents = self.agent_state
+        contact_range = np.full(len(state['x']), Adversary.ENTITY_RADIUS + Entity.ENTITY_RADIUS, dtype=float)
+        query_index, target_index, _ = pairs_within(state['x'], state['y'], contact_range, agents['x'], agents['y'])
+        in_contact = agents['alive'][target_index] & ~(agents['satisfied'][target_index] & agents['at_edge'][target_index])
+
+        adversary = query_index[in_contact]
+        agent = target_index[in_contact]
+
+        # Adversaries attack in index order, so each agent is eaten by the first adversary in contact it cannot defend against,
+        # and fights off every adversary before that one (all of them if none is strong enough)
+        kills = agents['strength'][agent] < state['attack_power'][adversary]
+        first_killer = np.full(len(agents['x']), len(state['x']), dtype=np.int64)
+        np.minimum.at(first_killer, agent[kills], adversary[kills])
+        eaten = kills & (adversary == first_killer[agent])
+        defended = ~kills & (adversary < first_killer[agent])
+
+        agents['alive'][agent[eaten]] = False
+        np.add.at(state['consumed'], adversary[eaten], 1)
+        state['cooldown'][adversary[eaten]] = Adversary.COOLDOWN_AFTER_EATING
+        self.defended[adversary[defended], agents['uid'][agent[defended]]] = True
+
+    def store_experience(self, indices, current_state, actions, rewards):
+        # Log each surviving agent's transition in its own replay buffer, as perform_action does
+        alive = self.agent_state['alive'][indices]
+        new_state = self.build_states(indices[alive])
+        if self.replay_store is not None:
+            self.replay_store.add_batch(self.agent_state['replay_id'][indices[alive]], current_state[alive], actions[alive],
+                                        rewards[alive], new_state, np.zeros(len(new_state), dtype=bool))
+            return
+
+        for row, position in enumerate(np.flatnonzero(alive)):
+            agent = self.population[indices[position]]
+            agent.replay_buffer.add(current_state[position].reshape(1, -1), int(actions[position]), float(rewards[position]), new_state[row].tolist(), False)
+
+    def remove_dead(self):
+        # Compact the arrays and the facade lists once all of the tick's eating has been resolved
+        alive = self.agent_state['alive']
+        if not np.all(alive):
+            for agent, keep in zip(self.population, alive):
+                if not keep:
+                    self.trait_stats.remove(agent)
+            self.population[:] = [agent for agent, keep in zip(self.population, alive) if keep]
+            self.agent_state = {key: values[alive] for key, values in self.agent_state.items()}
+            self.grids.pop('agent', None)
+
+        alive = self.food_state['alive']
+        if not np.all(alive):
+            self.food[:] = [food_item for food_item, keep in zip(self.food, alive) if keep]
+            self.food_state = {key: values[alive] for key, values in self.food_state.items()}
+            self.grids.pop('food', None)
+            self.food_version = next(SpatialGrid.VERSIONS)
+
+    def remove_food(self, food_item):
+        self.food_state['alive'][self.food.index(food_item)] = False
+        self.remove_dead()
+
+    def remove_agent(self, agent):
+        self.agent_state['alive'][self.population.index(agent)] = False
+        self.remove_dead()
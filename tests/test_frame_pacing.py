@@ -0,0 +1,42 @@
+"""
+File name: test_frame_pacing.py
+Author(s): Liam Lawless
+Date created: October 18, 2026
+Last modified: October 18, 2026
+
+Description:
+    Checks how many ticks SimulationRunner.advance_frame runs per GUI frame at the edges of the speed range.
+    Run from the repository root with python -m unittest or python -m pytest.
+
+"""
+
+import math
+import time
+import unittest
+
+from controller.simulation import SimulationRunner
+
+class FixedTicksPerFrameTest(unittest.TestCase):
+    def setUp(self):
+        self.ticks_per_frame = SimulationRunner.TICKS_PER_FRAME
+        SimulationRunner.TICKS_PER_FRAME = 4
+        self.runner = SimulationRunner(None, None, (200, 200), 5, 0, 10, 1000, 1, 1, 0, False, model_path=None)
+        self.runner.begin_generation()
+        self.runner.last_callback = time.perf_counter()
+
+    def tearDown(self):
+        SimulationRunner.TICKS_PER_FRAME = self.ticks_per_frame
+
+    def test_infinite_speed_runs_until_the_frame_budget(self):
+        self.runner.set_speed(math.inf)
+        self.runner.advance_frame()
+        self.assertGreater(self.runner.game_tick, 0)
+        self.assertEqual(self.runner.tick_debt, 0.0)
+
+    def test_zero_speed_runs_no_ticks(self):
+        self.runner.set_speed(0)
+        self.runner.advance_frame()
+        self.assertEqual(self.runner.game_tick, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,67 +2,87 @@
 File name: agent_sensing_view.py
 Author(s): Liam Lawless
 Date created: November 24, 2023
-Last modified: November 24, 2023
+Last modified: October 17, 2026
 
 Description:
     This file contains the AgentSensingView class, which handles the graphical representations of the agents vision and direction.
+    Each sensing radius is a pre-rendered sprite (the vision circle with the heading wedge on top) taken from a least recently used cache, and the canvas image items showing them are reused from frame to frame.
 
 Dependencies:
     - PIL (Pillow): Provides ability to create an image with transparency
 """
 
-from PIL import Image, ImageTk, ImageDraw
+from collections import OrderedDict
+from PIL import ImageTk
+
+from view.frame_renderer import draw_sensing_sprite
 
 class AgentSensingView:
+    SPRITE_CACHE_SIZE = 256  # Sprites kept before the least recently used one is dropped
+    HEADING_STEP = 5         # Headings are rounded to this many degrees so sprites can be shared
+
     def __init__(self, canvas):
         self.canvas = canvas
-        self.images = []  # Keep references to prevent garbage collection
+        self.sprites = OrderedDict()  # (size, heading, colours, alphas) -> PhotoImage
+        self.colours = {}             # Colour name -> 8 bit RGB
+        self.items = []               # Pool of canvas image items as [item id, shown sprite, shown position]
+        self.used = 0                 # Items used so far in the current frame
+
+    def rgb(self, colour):
+        if colour not in self.colours:
+            self.colours[colour] = tuple(channel >> 8 for channel in self.canvas.winfo_rgb(colour))
+        return self.colours[colour]
+
+    def render_sprite(self, width, height, heading_angle, body_fill, heading_fill, body_alpha, heading_alpha, start_angle):
+        # The same sprite the offscreen FrameRenderer draws, wrapped for the canvas
+        image = draw_sensing_sprite(width, height, heading_angle, self.rgb(body_fill), self.rgb(heading_fill), body_alpha, heading_alpha, start_angle)
+        return ImageTk.PhotoImage(image)
+
+    def sprite(self, width, height, heading_angle, body_fill, heading_fill, body_alpha, heading_alpha, start_angle):
+        heading = round(start_angle / AgentSensingView.HEADING_STEP) * AgentSensingView.HEADING_STEP % 360
+        key = (width, height, heading, heading_angle, body_fill, heading_fill, body_alpha, heading_alpha)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.render_sprite(width, height, heading_angle, body_fill, heading_fill, body_alpha, heading_alpha, heading)
+            self.sprites[key] = sprite
+            if len(self.sprites) > AgentSensingView.SPRITE_CACHE_SIZE:
+                # Items still showing an evicted sprite hold their own reference to it
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(key)
+        return sprite
 
-    def create_transparent_oval(self, x, y, a, b, **options):
-        alpha = options.pop('alpha', 1) * 255
-        fill = options.pop('fill', '')
-        fill_rgb = self.canvas.winfo_rgb(fill) + (int(alpha),)
-        image = Image.new('RGBA', (a - x, b - y), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(image)
-        draw.ellipse((0, 0, a - x, b - y), fill=fill_rgb)
-        self.images.append(ImageTk.PhotoImage(image))
-        self.canvas.create_image(x, y, image=self.images[-1], anchor='nw')
-        outline_option = options.pop('outline', '')
-        if outline_option:
-            self.canvas.create_oval(x, y, a, b, outline=outline_option, **options)
+    def begin_frame(self):
+        self.used = 0
 
     def create_sensing_radius(self, x, y, width, height, heading_angle, body_fill, heading_fill, body_alpha=1.0, heading_alpha=1.0, start_angle=0):
-        # Determine the bottom-right coordinates of the bounding box based on the width and height
-        a = x + width
-        b = y + height
-        
-        # Draw the sensing circle
-        self.create_transparent_oval(x, y, a, b, 
-            fill=body_fill, 
-            alpha=body_alpha,
-            outline='')
+        # Show the sprite with the next pooled canvas item, creating one only when the pool runs out. Returns whether an item was created
+        sprite = self.sprite(width, height, heading_angle, body_fill, heading_fill, body_alpha, heading_alpha, start_angle)
+        if self.used == len(self.items):
+            self.items.append([self.canvas.create_image(x, y, image=sprite, anchor='nw', tags='sensing'), sprite, (x, y)])
+            self.used += 1
+            return True
 
-        # Adjust start angle
-        start_angle = start_angle
-        
-        # Calculate the start and end angles for the heading
-        half_heading_angle = heading_angle / 2
-        start_heading_angle = start_angle - half_heading_angle
-        end_heading_angle = start_angle + half_heading_angle
+        item = self.items[self.used]
+        self.used += 1
+        if item[1] is not sprite:
+            self.canvas.itemconfigure(item[0], image=sprite, state='normal')
+            item[1] = sprite
+        if item[2] != (x, y):
+            self.canvas.coords(item[0], x, y)
+            item[2] = (x, y)
+        return False
 
-        # Create an overlay image for the heading with a wedge shape
-        heading_image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(heading_image)
-        
-        # Draw the heading cut-out as a filled pie slice with the fill color and alpha
-        mouth_fill_with_alpha = self.canvas.winfo_rgb(heading_fill) + (int(heading_alpha * 255),)
-        draw.pieslice([(0, 0), (width, height)], start=start_heading_angle, end=end_heading_angle, fill=mouth_fill_with_alpha)
-        
-        # Overlay the heading image onto the body
-        self.images.append(ImageTk.PhotoImage(heading_image))
-        self.canvas.create_image(x, y, image=self.images[-1], anchor='nw')
+    def end_frame(self):
+        # Hide the pooled items this frame did not need
+        for item in self.items[self.used:]:
+            if item[1] is not None:
+                self.canvas.itemconfigure(item[0], state='hidden')
+                item[1] = None
 
     def clear_sensing_radii(self):
-        for image in self.images:
-            self.canvas.delete(image)
-        self.images.clear()  # Clear the references to the images
\ No newline at end of file
+        # Delete the canvas items themselves; the cached sprites stay for the next generation
+        for item in self.items:
+            self.canvas.delete(item[0])
+        self.items.clear()
+        self.used = 0
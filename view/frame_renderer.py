@@ -0,0 +1,160 @@
+"""
+File name: frame_renderer.py
+Author(s): Liam Lawless
+Date created: October 17, 2026
+Last modified: October 17, 2026
+
+Description:
+    Draws the same scene as SimulationView with PIL instead of Tk, so runs can be recorded without a window. FrameRecorder takes a cheap snapshot of the environment every Nth tick and hands it to a background thread through a bounded queue, where frames are rendered and saved as a PNG sequence or an animated GIF.
+
+Dependencies:
+    - PIL (Pillow): Draws and encodes the frames
+"""
+
+import os
+import queue
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
+
+from model.adversary import Adversary
+from model.entity import Entity
+from model.food import Food
+
+def draw_sensing_sprite(width, height, heading_angle, body_rgb, heading_rgb, body_alpha, heading_alpha, start_angle):
+    # The vision circle with the heading wedge composited on top, as an RGBA image
+    image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(image).ellipse((0, 0, width, height), fill=tuple(body_rgb) + (int(body_alpha * 255),))
+
+    # Calculate the start and end angles for the heading
+    half_heading_angle = heading_angle / 2
+    heading_image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(heading_image).pieslice([(0, 0), (width, height)], start=start_angle - half_heading_angle,
+                                           end=start_angle + half_heading_angle, fill=tuple(heading_rgb) + (int(heading_alpha * 255),))
+    return Image.alpha_composite(image, heading_image)
+
+def capture_scene(environment):
+    # Copy what a frame needs out of the entities so rendering can happen on another thread
+    return {
+        'agents': np.array([(agent.position.x, agent.position.y, agent.size, agent.vision, agent.heading, agent.is_safe())
+                            for agent in environment.population], dtype=float).reshape(-1, 6),
+        'food': np.array([(food_item.position.x, food_item.position.y) for food_item in environment.food], dtype=float).reshape(-1, 2),
+        'adversaries': np.array([(adversary.position.x, adversary.position.y) for adversary in environment.adversaries], dtype=float).reshape(-1, 2),
+    }
+
+class FrameRenderer:
+    SPRITE_CACHE_SIZE = 256
+    HEADING_STEP = 5  # Degrees, as in AgentSensingView
+
+    def __init__(self, bounds, show_sensing=False, background='white'):
+        self.bounds = bounds
+        self.show_sensing = show_sensing
+        self.background = background
+        self.sprites = OrderedDict()
+
+    def sensing_sprite(self, size, heading, safe):
+        # Same colours and transparency as the sensing radii drawn by SimulationView
+        heading = round(heading / FrameRenderer.HEADING_STEP) * FrameRenderer.HEADING_STEP % 360
+        key = (size, heading, safe)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            body_rgb = ImageColor.getrgb('green' if safe else 'blue')
+            sprite = draw_sensing_sprite(size, size, 30, body_rgb, ImageColor.getrgb('green'), 0.25, 0.4, heading)
+            self.sprites[key] = sprite
+            if len(self.sprites) > FrameRenderer.SPRITE_CACHE_SIZE:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(key)
+        return sprite
+
+    def render(self, scene):
+        frame = Image.new('RGBA', tuple(self.bounds), self.background)
+
+        agents = scene['agents']
+        if self.show_sensing:
+            for x, y, _, vision, heading, safe in agents:
+                sensing_radius = vision * Entity.VISION_RANGE_MULTIPLIER
+                left, top = int(x - sensing_radius), int(y - sensing_radius)
+                sprite = self.sensing_sprite(int(sensing_radius * 2), np.degrees(heading), bool(safe))
+
+                # Older Pillow refuses negative destinations, so crop the part hanging off the top or left instead
+                frame.alpha_composite(sprite, dest=(max(left, 0), max(top, 0)), source=(max(-left, 0), max(-top, 0)))
+
+        draw = ImageDraw.Draw(frame)
+        for x, y, size, *_ in agents:
+            # Agent should be drawn with radius of 5 at smallest size
+            radius = (Entity.ENTITY_RADIUS - 1) + size
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill='blue')
+
+        radius = Food.ENTITY_RADIUS
+        for x, y in scene['food']:
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill='green')
+
+        radius = Adversary.ENTITY_RADIUS
+        for x, y in scene['adversaries']:
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill='red')
+
+        return frame.convert('RGB')
+
+class FrameRecorder:
+    # Records every Nth tick as a numbered PNG or as one animated GIF written when the recorder is closed
+    MAX_GIF_FRAMES = 1000  # GIF frames held in memory; past this every other frame is dropped and later ones are kept half as often
+
+    def __init__(self, directory, bounds, every=1, image_format='png', show_sensing=False, frame_duration=40, max_pending=16):
+        self.directory = directory
+        self.every = every
+        self.image_format = image_format
+        self.frame_duration = frame_duration  # Milliseconds each GIF frame is shown
+        self.renderer = FrameRenderer(bounds, show_sensing)
+        self.frames = []      # Palette GIF frames waiting to be written
+        self.gif_stride = 1   # Captured frames per kept GIF frame, doubled each time the frames are thinned out
+        self.count = 0
+        self.error = None     # First exception raised on the worker thread
+
+        os.makedirs(directory, exist_ok=True)
+        self.queue = queue.Queue(max_pending)  # Blocks the simulation only when the encoder falls this far behind
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def check(self):
+        if self.error is not None:
+            raise RuntimeError("Frame recording failed") from self.error
+
+    def submit(self, environment, label):
+        self.check()
+        self.queue.put((label, capture_scene(environment)))
+
+    def work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # Keep draining so the simulation never blocks on a dead recorder
+            try:
+                self.write(*item)
+            except Exception as error:
+                self.error = error
+
+    def write(self, label, scene):
+        if self.image_format == 'gif':
+            if self.count % self.gif_stride == 0:
+                self.frames.append(self.renderer.render(scene).quantize(colors=64))
+                if len(self.frames) > FrameRecorder.MAX_GIF_FRAMES:
+                    self.frames = self.frames[::2]
+                    self.gif_stride *= 2
+        else:
+            self.renderer.render(scene).save(os.path.join(self.directory, f'frame_{label}.png'))
+        self.count += 1
+
+    def close(self):
+        # Finish every queued frame, then write the GIF
+        self.queue.put(None)
+        self.thread.join()
+        self.check()
+        if self.image_format == 'gif' and self.frames:
+            # Thinned out frames are shown for longer so the animation keeps its pace
+            self.frames[0].save(os.path.join(self.directory, 'simulation.gif'), save_all=True,
+                                append_images=self.frames[1:], duration=self.frame_duration * self.gif_stride, loop=0)
+            self.frames = []
@@ -2,10 +2,11 @@
 File name: simulation_view.py
 Author(s): Liam Lawless
 Date created: November 23, 2023
-Last modified: November 25, 2023
+Last modified: October 18, 2026
 
 Description:
     This file contains the SimulationView class, which handles all the graphical representations of the simulation on the Tkinter canvas.
+    Every entity keeps a single canvas item for as long as it is in the environment, and each tick only moves, adds or deletes the items whose entities changed.
 
 """
 
@@ -18,114 +19,135 @@ class SimulationView:
     def __init__(self, canvas, environment):
         self.canvas = canvas
         self.environment = environment
-        self.agent_shapes = {}  # Maps agents to their canvas shapes
+        self.agent_shapes = {}  # Maps agents to [canvas shape, drawn bounding box]
         self.food_shapes = {}   # Maps Food objects to their canvas shapes
-        self.adversary_shapes = {}  # Maps adversaries to their canvas shapes
+        self.food_version = None  # Environment food version the food shapes were last drawn for
+        self.adversary_shapes = {}  # Maps adversaries to [canvas shape, drawn bounding box]
         self.sensing_view = AgentSensingView(canvas)  # Instantiate once for reusability
 
     def draw_initial_state(self):
-        self.draw_agents()
-        self.draw_food()
-        self.draw_adversaries()
+        self.update_view()
+
+    def sync_shapes(self, shapes, entities, radius_for, fill, tag):
+        # Keep one oval per entity: create it the first time the entity is seen, move it only when its box changed,
+        # and delete it once the entity has left the environment. Returns whether any shape was created
+        created = False
+        current = set()
+        for entity in entities:
+            current.add(entity)
+            radius = radius_for(entity)
+            x, y = entity.position.x, entity.position.y
+            box = (x - radius, y - radius, x + radius, y + radius)
+
+            entry = shapes.get(entity)
+            if entry is None:
+                shapes[entity] = [self.canvas.create_oval(*box, fill=fill, outline='', tags=tag), box]
+                created = True
+            elif entry[1] != box:
+                self.canvas.coords(entry[0], *box)
+                entry[1] = box
+
+        if len(shapes) > len(current):
+            for entity in [entity for entity in shapes if entity not in current]:
+                self.canvas.delete(shapes.pop(entity)[0])
+        return created
 
     def draw_agents(self):
-        # Clear existing agents from the canvas
-        for shape in self.agent_shapes.values():
-            self.canvas.delete(shape)
-        self.agent_shapes.clear()
-
-        # Clear existing sensing radii from the canvas
-        self.sensing_view.clear_sensing_radii()
-
-        for agent in self.environment.population:
-            # Agent's center position
-            x, y = agent.position.x, agent.position.y
-
-            # Factor agent size (Agent should be drawn with radius of 5 at smallest size)
-            agent_size = (agent.ENTITY_RADIUS - 1) + agent.size
-
-            # If sensing, draw the vision radius first
-            if SimulationView.SHOW_SENSING:
-                # Calculate the top-left corner of the sensing radius
-                sensing_radius = agent.vision * agent.VISION_RANGE_MULTIPLIER
-                top_left_x = x - sensing_radius
-                top_left_y = y - sensing_radius
-
-                # Convert the agent's heading to a start_angle that corresponds to the canvas orientation
-                heading_degrees = math.degrees(agent.heading)
-
-                if agent.is_safe():
-                    body_color = 'green'
-                else:
-                    body_color = 'blue'
-
-                # Draw the sensing radius centered on the agent
-                self.sensing_view.create_sensing_radius(
-                    int(top_left_x), int(top_left_y),
-                    int(sensing_radius * 2), int(sensing_radius * 2),  # width and height
-                    heading_angle=30,  # Fixed arc angle for the heading indicator
-                    body_fill=body_color, heading_fill="green",
-                    body_alpha=0.25, heading_alpha=0.4, start_angle=heading_degrees
-                )
-
-            # Draw the agent on top of the radius if necessary
-            agent_shape = self.canvas.create_oval(
-                x - agent_size, y - agent_size,
-                x + agent_size, y + agent_size,
-                fill='blue',
-                outline=''
-            )
-            self.agent_shapes[agent] = agent_shape
+        # Factor agent size (Agent should be drawn with radius of 5 at smallest size)
+        created = self.sync_shapes(self.agent_shapes, self.environment.population,
+                                   lambda agent: (agent.ENTITY_RADIUS - 1) + agent.size, 'blue', 'agent')
+
+        # Sensing radii reuse their canvas items every tick and sit underneath the agents
+        if SimulationView.SHOW_SENSING:
+            self.sensing_view.begin_frame()
+            sensing_created = False
+            for agent in self.environment.population:
+                sensing_created = self.draw_sensing_radius(agent) or sensing_created
+            self.sensing_view.end_frame()
+            if sensing_created:
+                self.canvas.tag_lower('sensing')
+        return created
+
+    def draw_sensing_radius(self, agent):
+        # Agent's center position
+        x, y = agent.position.x, agent.position.y
+
+        # Calculate the top-left corner of the sensing radius
+        sensing_radius = agent.vision_radius
+        top_left_x = x - sensing_radius
+        top_left_y = y - sensing_radius
+
+        # Convert the agent's heading to a start_angle that corresponds to the canvas orientation
+        heading_degrees = math.degrees(agent.heading)
+
+        if agent.is_safe():
+            body_color = 'green'
+        else:
+            body_color = 'blue'
+
+        # Draw the sensing radius centered on the agent
+        return self.sensing_view.create_sensing_radius(
+            int(top_left_x), int(top_left_y),
+            int(sensing_radius * 2), int(sensing_radius * 2),  # width and height
+            heading_angle=30,  # Fixed arc angle for the heading indicator
+            body_fill=body_color, heading_fill="green",
+            body_alpha=0.25, heading_alpha=0.4, start_angle=heading_degrees
+        )
 
     def draw_food(self):
-        for shape in self.food_shapes.values():
-            self.canvas.delete(shape)
-        self.food_shapes = {}
-
+        # Food never moves, so nothing is done until the environment reports food was eaten or spawned,
+        # and then only those items touch the canvas
+        if self.food_version == self.environment.food_version and len(self.food_shapes) == len(self.environment.food):
+            return False
+        self.food_version = self.environment.food_version
+
+        current = set(self.environment.food)
+        created = False
         for food_item in self.environment.food:
-            x, y = food_item.position.x, food_item.position.y
-            shape = self.canvas.create_oval(
-                x - food_item.ENTITY_RADIUS, y - food_item.ENTITY_RADIUS,
-                x + food_item.ENTITY_RADIUS, y + food_item.ENTITY_RADIUS,
-                fill= 'green',
-                outline=''
-            )
-            self.food_shapes[food_item] = shape
+            if food_item not in self.food_shapes:
+                x, y = food_item.position.x, food_item.position.y
+                self.food_shapes[food_item] = self.canvas.create_oval(
+                    x - food_item.ENTITY_RADIUS, y - food_item.ENTITY_RADIUS,
+                    x + food_item.ENTITY_RADIUS, y + food_item.ENTITY_RADIUS,
+                    fill='green',
+                    outline='',
+                    tags='food'
+                )
+                created = True
 
-    def draw_adversaries(self):
-        # Clear existing adversaries from the canvas
-        for shape in self.adversary_shapes.values():
-            self.canvas.delete(shape)
-        self.adversary_shapes.clear()
+        if len(self.food_shapes) > len(current):
+            for food_item in [food_item for food_item in self.food_shapes if food_item not in current]:
+                self.canvas.delete(self.food_shapes.pop(food_item))
+        return created
 
-        for adversary in self.environment.adversaries:
-            shape = self.canvas.create_oval(
-                adversary.position.x - adversary.ENTITY_RADIUS,
-                adversary.position.y - adversary.ENTITY_RADIUS,
-                adversary.position.x + adversary.ENTITY_RADIUS,
-                adversary.position.y + adversary.ENTITY_RADIUS,
-                fill='red',
-                outline=''
-            )
-            self.adversary_shapes[adversary] = shape
+    def draw_adversaries(self):
+        return self.sync_shapes(self.adversary_shapes, self.environment.adversaries,
+                                lambda adversary: adversary.ENTITY_RADIUS, 'red', 'adversary')
 
     def update_view(self):
-        self.draw_agents()
-        self.draw_food()
-        self.draw_adversaries()
+        created = self.draw_agents()
+        created = self.draw_food() or created
+        created = self.draw_adversaries() or created
+
+        # New shapes go on top, so restore the stacking order: agents, then food, then adversaries
+        if created:
+            self.canvas.tag_raise('food')
+            self.canvas.tag_raise('adversary')
 
     def clear_canvas(self):
         # Clear existing adversaries from the canvas
-        for shape in self.adversary_shapes.values():
+        for shape, _ in self.adversary_shapes.values():
             self.canvas.delete(shape)
         self.adversary_shapes.clear()
 
         # Clear existing food from the canvas
         for shape in self.food_shapes.values():
             self.canvas.delete(shape)
-        self.food_shapes = {}
+        self.food_shapes.clear()
+        self.food_version = None
 
-        # Clear existing agents from the canvas
-        for shape in self.agent_shapes.values():
+        # Clear existing agents and their sensing radii from the canvas
+        for shape, _ in self.agent_shapes.values():
             self.canvas.delete(shape)
         self.agent_shapes.clear()
+        self.sensing_view.clear_sensing_radii()
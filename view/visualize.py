@@ -2,10 +2,11 @@
 File name: visualize.py
 Author(s): Liam Lawless
 Date created: November 26, 2023
-Last modified: November 26, 2023
+Last modified: October 17, 2026
 
 Description:
 Provides visualization functionality, offering methods to plot the distribution and historical trends of various traits among agents using matplotlib
+The history can be the runner's trait_history dict or a MetricsReader over the streamed metrics files
 
 """
 
@@ -13,17 +14,23 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 class Visualize:
+    MAX_PLOT_POINTS = 2000  # Longer histories are plotted at a stride, so only that many values are read
 
-    def __init__(self, trait_distribution, trait_history):
+    def __init__(self, trait_distribution, trait_history, trait_histograms=None):
         self.trait_distribution = trait_distribution
         self.trait_history = trait_history
+        self.trait_histograms = trait_histograms or {}  # Precomputed (bin edges, counts) per trait, used instead of the value lists
 
     def plot_trait_distribution(self, trait):
-        max_trait_value = max(self.trait_distribution[trait])
-        bins = np.arange(0, max_trait_value + 1.1, 0.1)  # Bins from 0 to max value + 1, with step size 0.1
-
         plt.figure()
-        plt.hist(self.trait_distribution[trait], bins=bins, edgecolor='black')
+        if trait in self.trait_histograms:
+            edges, counts = self.trait_histograms[trait]
+            max_trait_value = edges[-1]
+            plt.stairs(counts, edges, fill=True, edgecolor='black')
+        else:
+            max_trait_value = max(self.trait_distribution[trait])
+            bins = np.arange(0, max_trait_value + 1.1, 0.1)  # Bins from 0 to max value + 1, with step size 0.1
+            plt.hist(self.trait_distribution[trait], bins=bins, edgecolor='black')
         plt.xticks(np.arange(0, max_trait_value + 1, 0.5))  # Ticks every 0.5
         plt.title(f'Distribution of {trait.capitalize()} Among Agents')
         plt.xlabel(trait.capitalize())
@@ -32,11 +39,13 @@ class Visualize:
     
     def plot_trait_history(self, ax, trait):
         # ax should be a single Axes object passed from the subplots
-        ax.plot(self.trait_history[trait])
+        history = self.trait_history[trait]
+        stride = max(1, -(-len(history) // Visualize.MAX_PLOT_POINTS))
+        ax.plot(range(0, len(history), stride), np.asarray(history[::stride]))
         ax.set_title(f'Average {trait.capitalize()} of Agents Over Generations')
         ax.set_xlabel('Generation')
         ax.set_ylabel(f'Average {trait.capitalize()}')
-        ax.set_xticks(range(0, len(self.trait_history[trait]) + 1, 5))
+        ax.set_xticks(range(0, len(history) + 1, 5 * max(1, len(history) // 100)))  # Ticks every 5 generations, sparser for long runs
 
     def visualize_history(self, traits):
         num_traits = len(traits)